@@ -2,7 +2,9 @@ import os
 import sqlite3
 from src.models.category import Category
 from src.models.password import Base, Password
-from sqlalchemy import create_engine
+from src.utils.database import create_vault_engine
+from src.utils.migrations import run_migrations
+from src.utils.pinyin import pinyin_keys
 from sqlalchemy.orm import sessionmaker
 
 def recreate_database():
@@ -25,16 +27,19 @@ def recreate_database():
     # 创建新的数据库和表
     try:
         # 创建引擎和会话
-        engine = create_engine("sqlite:///passwords.db")
+        engine = create_vault_engine("sqlite:///passwords.db")
         Session = sessionmaker(bind=engine)
         session = Session()
         
         # 创建所有表
         Base.metadata.create_all(engine)
+        run_migrations(engine)
         print("已创建数据库表")
         
         # 添加默认分类
-        default_category = Category(name="默认", description="默认分类")
+        name_pinyin, name_initials = pinyin_keys("默认")
+        default_category = Category(name="默认", description="默认分类",
+                                    name_pinyin=name_pinyin, name_initials=name_initials)
         session.add(default_category)
         session.commit()
         print("已创建默认分类")
@@ -0,0 +1,48 @@
+"""
+轮换数据密钥 - 生成新的数据密钥并重新加密所有密码
+
+中断（Ctrl+C、崩溃）后再次运行会从检查点继续，轮换完成前应用程序仍可正常解锁和读取；
+运行期间不要打开应用程序（应用程序不知道新密钥，会继续用旧密钥写入）
+"""
+import getpass
+from src.controllers.key_rotation import KeyRotation
+from src.controllers.password_manager import PasswordManager
+from src.utils.vault_config import config_exists
+
+def print_progress(done: int, total: int):
+    """在同一行显示进度"""
+    print(f"\r已重新加密 {done}/{total}", end="", flush=True)
+
+def rotate_keys():
+    """轮换数据密钥"""
+    if not config_exists():
+        print("密码库不存在，请先运行应用程序创建密码库")
+        return
+    
+    print("请先关闭正在使用密码库的应用程序，然后按回车键继续...")
+    input()
+    
+    password = getpass.getpass("请输入主密码: ")
+    rotation = KeyRotation(PasswordManager())
+    resuming = KeyRotation.pending()
+    
+    print("正在验证主密码...")
+    if not rotation.start(password):
+        print("主密码不正确")
+        return
+    print("继续上次未完成的密钥轮换" if resuming else "已生成新的数据密钥，开始重新加密")
+    
+    try:
+        rotation.run(progress=print_progress)
+    except KeyboardInterrupt:
+        # 当前批次的事务已回滚，检查点保持在上一批
+        print("\n已中断，再次运行此脚本会从中断处继续")
+        return
+    except Exception as e:
+        print(f"\n轮换数据密钥失败: {str(e)}")
+        print("已完成的部分已保存，排除问题后再次运行此脚本会从中断处继续")
+        return
+    print("\n数据密钥轮换完成")
+
+if __name__ == "__main__":
+    rotate_keys()
@@ -0,0 +1,74 @@
+"""
+密钥轮换模块 - 生成新的数据密钥并用它重新加密所有密码
+
+开始轮换时新旧数据密钥都用主密码加密保存到config.json（旧密钥在"previous_wrapped_keys"），
+记录按ID顺序分批重新加密，检查点保存在数据库中。轮换中断（程序退出、崩溃、暂停）后，
+解锁密码库时会同时加载旧密钥，未重新加密的记录照常读取，再次调用run()从检查点继续。
+界面（KeyRotationDialog、主窗口启动时继续）和脚本rotate_keys.py共用这里的流程。
+"""
+from typing import Callable
+from src.controllers.password_manager import PasswordManager
+from src.utils import envelope
+from src.utils.kdf import KdfParams
+from src.utils.vault_config import config_exists, load_config, save_config, uses_compact_records
+
+
+class KeyRotation:
+    """数据密钥轮换"""
+
+    def __init__(self, password_manager: PasswordManager, batch_size: int = 500):
+        self.password_manager = password_manager
+        self.batch_size = batch_size
+
+    @staticmethod
+    def pending() -> bool:
+        """是否有未完成的密钥轮换"""
+        return config_exists() and envelope.is_rotating(load_config())
+
+    def start(self, password: str) -> bool:
+        """验证主密码并开始轮换，主密码不正确时返回False（耗时操作，请在后台线程调用）
+
+        已有未完成的轮换时不生成新密钥，只加载旧密钥以便继续；
+        密码管理器尚未解锁时（脚本中）同时用当前数据密钥解锁
+        """
+        config = load_config()
+        keys = envelope.unlock_keys(config, password)
+        if keys is None:
+            return False
+        encryption_manager = self.password_manager.encryption_manager
+        if encryption_manager.key is None:
+            encryption_manager.initialize(keys[0])
+            encryption_manager.compact_records = uses_compact_records(config)
+        elif encryption_manager.key != keys[0]:
+            raise RuntimeError("配置文件与当前打开的密码库不一致")
+        if envelope.is_rotating(config):
+            encryption_manager.set_previous_keys(keys[1:])
+            return True
+
+        data_key = envelope.generate_data_key()
+        params = KdfParams.from_config(config.get("kdf"))
+        new_config = envelope.seal_config(config, data_key, password, params, previous_keys=keys)
+        # 切换密钥时不能有正在执行的密文格式转换（它会用切换前读取的密文写回）；
+        # 先重置检查点再保存配置，保存配置后新写入的记录就会使用新密钥
+        with self.password_manager.reencrypt_lock:
+            self.password_manager.begin_key_rotation()
+            save_config(new_config)
+            encryption_manager.set_previous_keys(keys)
+            encryption_manager.initialize(data_key)
+        return True
+
+    def run(self, progress: Callable[[int, int], None] = None, cancelled: Callable[[], bool] = None) -> bool:
+        """重新加密检查点之后的记录，确认所有记录都只用新密钥即可解密后从配置中删除旧密钥
+
+        Args:
+            progress: 进度回调progress(已完成, 总数)，在调用线程执行
+            cancelled: 每批开始前调用，返回True时暂停
+
+        Returns:
+            bool: 轮换是否已完成，暂停时返回False
+        """
+        if not self.password_manager.reencrypt_records(self.batch_size, progress, cancelled):
+            return False
+        save_config(envelope.drop_previous_keys(load_config()))
+        self.password_manager.encryption_manager.set_previous_keys([])
+        return True
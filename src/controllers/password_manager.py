@@ -1,18 +1,251 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
-from typing import List, Optional
-from src.models.password import Password, Base
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from types import SimpleNamespace
+from sqlalchemy import bindparam, func, insert, literal_column, or_, select, text, update
+from sqlalchemy.orm import scoped_session, sessionmaker, Session
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+from src.models.password import Password, PasswordSummary, PasswordFTS, SEARCH_COLUMNS, Base
 from src.models.category import Category
+from src.models.vault_meta import VaultMeta
 from src.utils.encryption import EncryptionManager
+from src.utils.secret_cache import SecretCache
+from src.utils.search_index import TrigramIndex
+from src.utils.database import create_vault_engine, DEFAULT_DB_URL
+from src.utils.migrations import run_migrations, has_password_fts
+from src.utils.query_parser import ParsedQuery, compile_filters, parse_query
+from src.utils.pinyin import pinyin_keys, is_pinyin_term
+
+ROTATION_CHECKPOINT = "rotation_last_id"  # vault_meta中密钥轮换已重新加密到的最大密码ID
+
+class PasswordChanges(NamedTuple):
+    """一次写入提交后的变化，通知给add_change_listener注册的监听函数"""
+    inserted: List[PasswordSummary]  # 新增的记录（带搜索列）
+    updated: List[PasswordSummary]  # 修改后的记录（带搜索列）
+    removed: List[int]  # 删除的密码ID
+
 
 class PasswordManager:
-    def __init__(self, db_url: str = "sqlite:///passwords.db"):
-        self.engine = create_engine(db_url)
-        self.Session = sessionmaker(bind=self.engine)
+    # 进程内共享的实例，按数据库URL区分
+    _instances: Dict[str, "PasswordManager"] = {}
+    _instances_lock = threading.Lock()
+    
+    def __init__(self, db_url: str = DEFAULT_DB_URL, profile: str = "default"):
+        """
+        应用内请使用PasswordManager.shared()获取共享实例，避免重复创建引擎
+        
+        Args:
+            db_url: 数据库URL
+            profile: SQLite性能配置，见src.utils.database.ENGINE_PROFILES
+        """
+        self.profile = profile
+        self.engine = create_vault_engine(db_url, profile)
+        # 每个线程使用自己的会话；提交后不过期属性，返回的对象在会话关闭后仍可读取
+        self.Session = scoped_session(sessionmaker(bind=self.engine, expire_on_commit=False))
         self.encryption_manager = EncryptionManager()
+        self.secret_cache: Optional[SecretCache] = None  # 默认不缓存明文，调用enable_secret_cache开启
+        self.search_index: Optional[TrigramIndex] = None  # 解锁后调用build_search_index建立
+        self._index_lock = threading.Lock()
+        self._index_dirty: Optional[set] = None  # 建立索引期间被修改的密码ID
+        self._index_generation = 0  # 每次丢弃索引时加1，用于作废正在建立的索引
+        self._change_listeners: List[Callable[[PasswordChanges], None]] = []
+        self._counts_lock = threading.Lock()
+        self._category_counts: Optional[Dict[Optional[int], int]] = None  # 类别ID -> 密码数量
+        self._counts_generation = 0  # 每次修改或作废数量缓存时加1
+        # 批量重新加密（密文格式转换、密钥轮换及其切换密钥）互斥执行
+        self.reencrypt_lock = threading.Lock()
         
-        # 初始化数据库表
+        # 初始化数据库表，并把已有数据库升级到最新结构
         Base.metadata.create_all(self.engine)
+        run_migrations(self.engine)
+        self.fts_enabled = has_password_fts(self.engine)
+    
+    @classmethod
+    def shared(cls, db_url: str = DEFAULT_DB_URL, profile: str = "default") -> "PasswordManager":
+        """获取进程内共享的密码管理器（同一数据库只创建一个引擎和连接池）
+        
+        同一数据库的共享实例只能使用一种性能配置，与已创建实例的配置不同时抛出ValueError
+        """
+        with cls._instances_lock:
+            if db_url not in cls._instances:
+                cls._instances[db_url] = cls(db_url, profile)
+            instance = cls._instances[db_url]
+            if instance.profile != profile:
+                raise ValueError(f"数据库 {db_url} 的共享实例已使用性能配置 {instance.profile}，不能再使用 {profile}")
+            return instance
+    
+    @contextmanager
+    def session_scope(self) -> Iterator[Session]:
+        """当前线程的会话范围，正常结束时提交，出错时回滚"""
+        session = self.Session()
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+    
+    def enable_secret_cache(self, max_size: int = 128, ttl: float = 300):
+        """开启解密缓存，重复复制/连接同一密码时不再查询和解密
+        
+        Args:
+            max_size: 最多缓存的密码条数
+            ttl: 缓存有效期（秒）
+        """
+        self.secret_cache = SecretCache(max_size, ttl)
+    
+    def clear_secret_cache(self):
+        """清空解密缓存（锁定时调用）"""
+        if self.secret_cache:
+            self.secret_cache.clear()
+    
+    def build_search_index(self) -> TrigramIndex:
+        """从数据库建立内存搜索索引（解锁后在后台调用）"""
+        with self._index_lock:
+            self._index_dirty = set()
+            generation = self._index_generation
+        try:
+            index = TrigramIndex()
+            for rows in self._iter_search_rows():
+                index.add_many(rows)
+        finally:
+            with self._index_lock:
+                dirty, self._index_dirty = self._index_dirty, None
+        with self._index_lock:
+            # 建立期间已锁定（索引被丢弃）时不再启用
+            if generation != self._index_generation:
+                return index
+            # 建立期间被修改的记录重新同步
+            self._sync_search_index(index, dirty)
+            self.search_index = index
+        return index
+    
+    def discard_search_index(self):
+        """丢弃内存搜索索引（锁定时调用）"""
+        with self._index_lock:
+            self.search_index = None
+            self._index_generation += 1
+    
+    def _iter_search_rows(self, password_ids: List[int] = None,
+                          batch_size: int = 2000) -> Iterator[List[PasswordSummary]]:
+        """按ID顺序分批读取带search_text的摘要记录，可只读取指定ID"""
+        session = self.Session()
+        try:
+            query = session.query(*PasswordSummary.SEARCH_COLUMNS)
+            if password_ids is not None:
+                for start in range(0, len(password_ids), 500):
+                    chunk = password_ids[start:start + 500]
+                    yield [PasswordSummary.from_search_row(row)
+                           for row in query.filter(Password.id.in_(chunk))]
+                return
+            after_id = 0
+            while True:
+                rows = query.filter(Password.id > after_id).order_by(Password.id).limit(batch_size).all()
+                if rows:
+                    yield [PasswordSummary.from_search_row(row) for row in rows]
+                if len(rows) < batch_size:
+                    return
+                after_id = rows[-1].id
+        finally:
+            session.close()
+    
+    def _sync_search_index(self, index: TrigramIndex, password_ids):
+        """从数据库重新读取指定记录并更新索引，已删除的记录从索引中移除"""
+        password_ids = list(password_ids)
+        if not password_ids:
+            return
+        found = set()
+        for rows in self._iter_search_rows(password_ids):
+            for row in rows:
+                index.add(row)
+                found.add(row.id)
+        for password_id in password_ids:
+            if password_id not in found:
+                index.remove(password_id)
+    
+    def add_change_listener(self, listener: Callable[[PasswordChanges], None]):
+        """注册写入通知，每次新增、修改、删除密码提交后调用listener(PasswordChanges)
+        
+        监听函数在执行写入的线程中调用，界面需要自行转到界面线程（见AsyncVault.changed）
+        """
+        self._change_listeners.append(listener)
+    
+    def remove_change_listener(self, listener: Callable[[PasswordChanges], None]):
+        """取消写入通知"""
+        if listener in self._change_listeners:
+            self._change_listeners.remove(listener)
+    
+    def _after_write(self, inserted: List[PasswordSummary] = (), updated: List[PasswordSummary] = (),
+                     removed: List[int] = (), category_deltas: Dict[Optional[int], int] = None):
+        """写入提交后同步内存中的派生数据，并通知监听函数
+        
+        Args:
+            category_deltas: 修改和删除引起的类别数量变化（新增的记录由inserted计算）
+        """
+        changes = PasswordChanges(list(inserted), list(updated), list(removed))
+        if not (changes.inserted or changes.updated or changes.removed):
+            return
+        deltas = dict(category_deltas or {})
+        for row in changes.inserted:
+            deltas[row.category_id] = deltas.get(row.category_id, 0) + 1
+        self._adjust_category_counts(deltas)
+        with self._index_lock:
+            if self._index_dirty is not None:
+                self._index_dirty.update(row.id for row in changes.inserted + changes.updated)
+                self._index_dirty.update(changes.removed)
+            if self.search_index is not None:
+                # 写入的记录已经带有搜索列，直接更新索引
+                self.search_index.add_many(changes.inserted + changes.updated)
+                for password_id in changes.removed:
+                    self.search_index.remove(password_id)
+        for listener in list(self._change_listeners):
+            listener(changes)
+    
+    def get_category_counts(self) -> Dict[Optional[int], int]:
+        """各类别的密码数量（类别ID -> 数量）
+        
+        第一次调用时用一条GROUP BY查询统计（使用类别索引），之后返回缓存，
+        新增、删除和移动类别时按变化量更新缓存，不再查询
+        """
+        with self._counts_lock:
+            if self._category_counts is not None:
+                return dict(self._category_counts)
+            generation = self._counts_generation
+        session = self.Session()
+        try:
+            counts = dict(session.query(Password.category_id, func.count(Password.id))
+                          .group_by(Password.category_id).all())
+        finally:
+            session.close()
+        with self._counts_lock:
+            # 统计期间有写入时不缓存，下次调用重新统计
+            if generation == self._counts_generation:
+                self._category_counts = counts
+        return dict(counts)
+    
+    def _adjust_category_counts(self, deltas: Dict[Optional[int], int]):
+        """按变化量更新类别数量缓存"""
+        deltas = {category_id: delta for category_id, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        with self._counts_lock:
+            self._counts_generation += 1
+            if self._category_counts is None:
+                return
+            for category_id, delta in deltas.items():
+                count = self._category_counts.get(category_id, 0) + delta
+                if count > 0:
+                    self._category_counts[category_id] = count
+                else:
+                    self._category_counts.pop(category_id, None)
+    
+    def invalidate_category_counts(self):
+        """作废类别数量缓存，下次get_category_counts时重新统计"""
+        with self._counts_lock:
+            self._counts_generation += 1
+            self._category_counts = None
     
     def initialize(self, master_password: str):
         """初始化密码管理器"""
@@ -20,6 +253,34 @@ class PasswordManager:
         self.encryption_manager.initialize(key)
         return salt
     
+    def get_categories(self) -> List[Category]:
+        """获取所有类别"""
+        with self.session_scope() as session:
+            return session.query(Category).order_by(Category.id).all()
+    
+    def add_category(self, name: str, description: str = None) -> Optional[Category]:
+        """添加类别，已存在同名类别时返回None"""
+        with self.session_scope() as session:
+            if session.query(Category.id).filter_by(name=name).first():
+                return None
+            name_pinyin, name_initials = pinyin_keys(name)
+            category = Category(name=name, description=description,
+                                name_pinyin=name_pinyin, name_initials=name_initials)
+            session.add(category)
+            session.flush()
+            return category
+    
+    def delete_category(self, category_id: int) -> bool:
+        """删除类别"""
+        with self.session_scope() as session:
+            category = session.query(Category).filter_by(id=category_id).first()
+            if not category:
+                return False
+            session.delete(category)
+        # 类别下的密码不再属于该类别，重新统计
+        self.invalidate_category_counts()
+        return True
+    
     def add_password(self, title: str, username: str, password: str, 
                     category_id: int, notes: str = "", host: str = None,
                     port: int = None, connection_type: str = None,
@@ -27,11 +288,13 @@ class PasswordManager:
         """添加新密码"""
         session = self.Session()
         try:
-            encrypted_password = self.encryption_manager.encrypt(password)
+            title_pinyin, title_initials = pinyin_keys(title)
             new_password = Password(
                 title=title,
+                title_pinyin=title_pinyin,
+                title_initials=title_initials,
                 username=username,
-                encrypted_password=encrypted_password,
+                encrypted_password="",
                 category_id=category_id,
                 notes=notes,
                 host=host,
@@ -40,22 +303,362 @@ class PasswordManager:
                 additional_params=additional_params
             )
             session.add(new_password)
+            # 密文与记录ID绑定，先取得ID再加密（同一事务）
+            session.flush()
+            new_password.encrypted_password = self.encryption_manager.encrypt_record(password, new_password.id)
             session.commit()
+            self._after_write(inserted=[PasswordSummary.from_password(new_password)])
             return new_password
         finally:
             session.close()
     
+    def add_passwords_bulk(self, passwords: Iterable[Dict[str, Any]],
+                           batch_size: int = 500) -> Tuple[int, List[Tuple[int, str]]]:
+        """批量添加密码，每批在一个事务中插入
+        
+        Args:
+            passwords: 密码字典序列，键与add_password的参数相同
+            batch_size: 每个事务插入的条数
+            
+        Returns:
+            tuple: (成功数量, [(序号, 错误信息), ...])，序号为该条在passwords中的位置
+        """
+        inserted = []
+        errors = []
+        batch = []
+        for index, data in enumerate(passwords):
+            batch.append((index, data))
+            if len(batch) >= batch_size:
+                inserted.extend(self._insert_batch(batch, errors))
+                batch = []
+        if batch:
+            inserted.extend(self._insert_batch(batch, errors))
+        self._after_write(inserted=inserted)
+        return len(inserted), errors
+    
+    def _insert_batch(self, batch: List[Tuple[int, Dict[str, Any]]],
+                      errors: List[Tuple[int, str]]) -> List[PasswordSummary]:
+        """加密并插入一批密码，单条失败只记录错误，不影响同批的其他记录，返回插入记录的摘要"""
+        now = datetime.utcnow()
+        valid = []
+        for index, data in batch:
+            if not data.get("title") or not data.get("username") or not data.get("password"):
+                errors.append((index, "缺少必要字段(标题/用户名/密码)"))
+            else:
+                valid.append((index, data))
+        secrets = [str(data["password"]).encode() for _, data in valid]
+        # 紧凑格式的密文与记录ID绑定，插入后再加密；Fernet格式在插入前整批并行加密
+        bind_ids = self.encryption_manager.compact_records
+        secrets_by_index = {}
+        if bind_ids:
+            encrypted_passwords = secrets
+            secrets_by_index = {index: secret for (index, _), secret in zip(valid, secrets)}
+        else:
+            encrypted_passwords = self.encryption_manager.encrypt_many(secrets)
+        rows = []
+        for (index, data), encrypted in zip(valid, encrypted_passwords):
+            try:
+                if isinstance(encrypted, Exception):
+                    raise encrypted
+                title_pinyin, title_initials = pinyin_keys(data["title"])
+                rows.append((index, {
+                    "title": data["title"],
+                    "title_pinyin": title_pinyin,
+                    "title_initials": title_initials,
+                    "username": data["username"],
+                    "encrypted_password": b"" if bind_ids else encrypted.decode(),
+                    "category_id": data.get("category_id"),
+                    "notes": data.get("notes", ""),
+                    "host": data.get("host"),
+                    "port": data.get("port"),
+                    "connection_type": data.get("connection_type"),
+                    "additional_params": data.get("additional_params"),
+                    "created_at": now,
+                    "updated_at": now
+                }))
+            except Exception as e:
+                errors.append((index, str(e)))
+        if not rows:
+            return []
+        
+        session = self.Session()
+        try:
+            # 整批一次性插入（executemany）
+            inserted_ids = self._insert_rows(session, [row for _, row in rows])
+            if bind_ids:
+                self._seal_inserted(session, [(password_id, secrets_by_index[index], row["updated_at"])
+                                              for password_id, (index, row) in zip(inserted_ids, rows)])
+            session.commit()
+            return [self._inserted_summary(password_id, row) for password_id, (_, row) in zip(inserted_ids, rows)]
+        except Exception:
+            session.rollback()
+        finally:
+            session.close()
+        
+        # 整批插入失败时逐条插入（仍在同一事务中），找出出错的记录
+        inserted = []
+        session = self.Session()
+        try:
+            for index, row in rows:
+                savepoint = session.begin_nested()
+                try:
+                    password_id, = self._insert_rows(session, [row])
+                    if bind_ids:
+                        self._seal_inserted(session, [(password_id, secrets_by_index[index], row["updated_at"])])
+                    savepoint.commit()
+                    inserted.append(self._inserted_summary(password_id, row))
+                except Exception as e:
+                    savepoint.rollback()
+                    # 只保留数据库驱动的错误信息，不带出SQL参数
+                    errors.append((index, str(getattr(e, "orig", e))))
+            session.commit()
+            return inserted
+        finally:
+            session.close()
+    
+    def _seal_inserted(self, session: Session, items: List[Tuple[int, bytes, datetime]]):
+        """为刚插入的记录（密文为占位值）按记录ID加密密码，items为[(id, 明文, updated_at), ...]"""
+        tokens = self.encryption_manager.encrypt_records([(password_id, secret) for password_id, secret, _ in items])
+        self._write_encrypted(session, [
+            (password_id, b"", self._stored_form(self._raise_failed(token)), updated_at)
+            for (password_id, _, updated_at), token in zip(items, tokens)
+        ])
+    
+    @staticmethod
+    def _inserted_summary(password_id: int, row: Dict[str, Any]) -> PasswordSummary:
+        """由插入的列值创建摘要记录"""
+        return PasswordSummary.from_password(SimpleNamespace(id=password_id, **row))
+    
+    @staticmethod
+    def _insert_rows(session: Session, rows: List[Dict[str, Any]]) -> List[int]:
+        """插入多行并返回新记录的ID（按rows顺序）"""
+        dialect = session.get_bind().dialect
+        if getattr(dialect, "insert_executemany_returning_sort_by_parameter_order", False):
+            result = session.execute(
+                insert(Password).returning(Password.id, sort_by_parameter_order=True), rows
+            )
+            return list(result.scalars())
+        # SQLite 3.35以下不支持RETURNING，逐条插入（仍在同一事务中）
+        return [session.execute(insert(Password), [row]).inserted_primary_key[0] for row in rows]
+    
     def get_password(self, password_id: int) -> Optional[Password]:
-        """获取密码"""
+        """获取密码（包含解密后的密码）"""
         session = self.Session()
         try:
             password = session.query(Password).filter_by(id=password_id).first()
             if password:
-                password.decrypted_password = self.encryption_manager.decrypt(password.encrypted_password)
+                self.decrypt_password(password)
             return password
         finally:
             session.close()
     
+    def get_decrypted_password(self, password_id: int) -> Optional[str]:
+        """只在真正需要时（复制、显示、连接、导出）解密单条密码"""
+        session = self.Session()
+        try:
+            row = session.query(Password.encrypted_password, Password.updated_at).filter_by(id=password_id).first()
+            if row is None:
+                return None
+            return self._decrypt_cached(password_id, row.updated_at, row.encrypted_password)
+        finally:
+            session.close()
+    
+    def decrypt_password(self, password: Password) -> str:
+        """解密已加载的密码记录，并写入decrypted_password属性"""
+        password.decrypted_password = self._decrypt_cached(
+            password.id, password.updated_at, password.encrypted_password
+        )
+        return password.decrypted_password
+    
+    def decrypt_passwords(self, passwords: List[Password]) -> List[Password]:
+        """批量解密已加载的密码记录（用于导出，不写入解密缓存），任一条解密失败时抛出异常"""
+        secrets = self.encryption_manager.decrypt_records(
+            [(password.id, password.encrypted_password) for password in passwords]
+        )
+        for password, secret in zip(passwords, secrets):
+            if isinstance(secret, Exception):
+                raise ValueError(f"解密密码失败: {password.title}") from secret
+            password.decrypted_password = secret.decode()
+        return passwords
+    
+    def _decrypt_cached(self, password_id: int, updated_at, encrypted_password: Union[str, bytes]) -> str:
+        """解密，开启缓存时优先使用updated_at未变化的缓存"""
+        if self.secret_cache is None:
+            return self.encryption_manager.decrypt_record(encrypted_password, password_id)
+        secret = self.secret_cache.get(password_id, updated_at)
+        if secret is None:
+            secret = self.encryption_manager.decrypt_record(encrypted_password, password_id)
+            self.secret_cache.put(password_id, updated_at, secret)
+        return secret
+    
+    def begin_key_rotation(self):
+        """开始新的密钥轮换：把重新加密的检查点设为从头开始"""
+        with self.session_scope() as session:
+            session.merge(VaultMeta(key=ROTATION_CHECKPOINT, value="0"))
+    
+    def reencrypt_records(self, batch_size: int = 500, progress: Callable[[int, int], None] = None,
+                          cancelled: Callable[[], bool] = None) -> bool:
+        """用当前数据密钥按ID顺序重新加密检查点之后的所有密码（密钥轮换）
+        
+        每批记录和检查点在同一个事务中提交，中断后再次调用从检查点继续；
+        尚未重新加密的记录由旧密钥解密（EncryptionManager.set_previous_keys），期间可以正常读写。
+        处理完最后一批后确认所有记录都只用当前密钥即可解密，否则从第一条未完成的记录继续。
+        全部完成时删除检查点并返回True，cancelled()返回True时在两批之间停止并返回False
+        
+        Args:
+            progress: 进度回调progress(已完成, 总数)，在调用线程执行
+            cancelled: 每批开始前调用，返回True时停止
+        """
+        with self.reencrypt_lock:
+            with self.session_scope() as session:
+                checkpoint = session.get(VaultMeta, ROTATION_CHECKPOINT)
+                # 没有检查点时（上次已处理完最后一批）只需确认所有记录都已使用当前密钥
+                after_id = (int(checkpoint.value) if checkpoint
+                            else session.query(func.coalesce(func.max(Password.id), 0)).scalar())
+                total = session.query(func.count(Password.id)).scalar()
+                done = session.query(func.count(Password.id)).filter(Password.id <= after_id).scalar()
+            if progress:
+                progress(done, total)
+            while True:
+                if cancelled and cancelled():
+                    return False
+                with self.session_scope() as session:
+                    rows = (session.query(Password.id, Password.encrypted_password, Password.updated_at)
+                            .filter(Password.id > after_id).order_by(Password.id).limit(batch_size).all())
+                    if rows:
+                        self._reencrypt_batch(session, rows)
+                        after_id = rows[-1].id
+                        session.merge(VaultMeta(key=ROTATION_CHECKPOINT, value=str(after_id)))
+                if not rows:
+                    stale_id = self._first_record_not_on_key(batch_size)
+                    with self.session_scope() as session:
+                        if stale_id is None:
+                            session.query(VaultMeta).filter(VaultMeta.key == ROTATION_CHECKPOINT).delete()
+                            return True
+                        # 检查点之前还有使用旧密钥的记录，从该记录重新处理
+                        after_id = stale_id - 1
+                        session.merge(VaultMeta(key=ROTATION_CHECKPOINT, value=str(after_id)))
+                    continue
+                done += len(rows)
+                if progress:
+                    # 轮换期间新增的记录也会被处理
+                    progress(done, max(done, total))
+    
+    def _reencrypt_batch(self, session: Session, rows):
+        """在当前事务中重新加密一批记录，读取后被修改的记录重新读取后再加密，不跳过任何一条"""
+        while rows:
+            changed = self._reencrypt_rows(session, rows)
+            rows = (session.query(Password.id, Password.encrypted_password, Password.updated_at)
+                    .filter(Password.id.in_(changed)).order_by(Password.id).all()) if changed else []
+    
+    def _first_record_not_on_key(self, batch_size: int = 500) -> Optional[int]:
+        """按ID顺序查找第一条不能只用当前数据密钥解密的记录，都可以解密时返回None"""
+        current_key_only = EncryptionManager()
+        current_key_only.initialize(self.encryption_manager.key)
+        after_id = 0
+        while True:
+            with self.session_scope() as session:
+                rows = (session.query(Password.id, Password.encrypted_password)
+                        .filter(Password.id > after_id).order_by(Password.id).limit(batch_size).all())
+            if not rows:
+                return None
+            secrets = current_key_only.decrypt_records([(row.id, row.encrypted_password) for row in rows])
+            for row, secret in zip(rows, secrets):
+                if isinstance(secret, Exception):
+                    return row.id
+            after_id = rows[-1].id
+    
+    def convert_records(self, compact: bool, batch_size: int = 500,
+                        progress: Callable[[int, int], None] = None, vacuum: bool = True,
+                        cancelled: Callable[[], bool] = None) -> int:
+        """把已有密文转换为紧凑格式（compact为True）或Fernet格式，并让之后的写入使用该格式
+        
+        每批在单独的事务中转换，只处理格式不同的记录，中断后再次调用会继续转换剩余的记录；
+        转换期间两种格式都可以正常读取。每批都用当前的数据密钥加密。
+        全部完成后执行VACUUM回收空间，返回转换的条数
+        
+        Args:
+            progress: 进度回调progress(已完成, 总数)，在调用线程执行
+            cancelled: 每批开始前调用，返回True时停止（不执行VACUUM）
+        """
+        self.encryption_manager.compact_records = compact
+        # 紧凑格式以BLOB保存，Fernet令牌以文本保存
+        pending = func.typeof(Password.encrypted_password) == ("text" if compact else "blob")
+        done = 0
+        with self.reencrypt_lock:
+            with self.session_scope() as session:
+                total = session.query(func.count(Password.id)).filter(pending).scalar()
+            after_id = 0
+            while True:
+                if cancelled and cancelled():
+                    return done
+                with self.session_scope() as session:
+                    rows = (session.query(Password.id, Password.encrypted_password, Password.updated_at)
+                            .filter(pending, Password.id > after_id).order_by(Password.id).limit(batch_size).all())
+                    if rows:
+                        self._reencrypt_rows(session, rows, compact)
+                if not rows:
+                    break
+                after_id = rows[-1].id
+                done += len(rows)
+                if progress:
+                    progress(done, total)
+        if vacuum and done:
+            self.vacuum()
+        return done
+    
+    def vacuum(self):
+        """重建数据库文件，回收删除和缩小的记录占用的空间（不能在事务中执行）"""
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.exec_driver_sql("VACUUM")
+    
+    def _reencrypt_rows(self, session: Session, rows, compact: Optional[bool] = None) -> List[int]:
+        """用当前数据密钥重新加密一批(id, encrypted_password, updated_at)，任一条失败时抛出异常
+        
+        Args:
+            compact: 新密文的格式，为None时按encryption_manager.compact_records
+        
+        Returns:
+            list: 读取后密文已被修改、因此没有写入的密码ID（已删除的记录不包括在内）
+        """
+        secrets = self.encryption_manager.decrypt_records([(row.id, row.encrypted_password) for row in rows])
+        tokens = self.encryption_manager.encrypt_records(
+            [(row.id, self._raise_failed(secret)) for row, secret in zip(rows, secrets)], compact)
+        written = {row.id: self._stored_form(self._raise_failed(token)) for row, token in zip(rows, tokens)}
+        self._write_encrypted(session, [
+            (row.id, row.encrypted_password, written[row.id], row.updated_at) for row in rows
+        ])
+        stored = session.query(Password.id, Password.encrypted_password).filter(Password.id.in_(list(written)))
+        return [password_id for password_id, value in stored if value != written[password_id]]
+    
+    @staticmethod
+    def _write_encrypted(session: Session, values: List[Tuple[int, Any, Union[str, bytes], Any]]):
+        """按(id, 原密文, 新密文, updated_at)批量写入密文
+        
+        只在密文仍为原密文时写入，读取后被用户修改的记录不会被覆盖；
+        保留updated_at，避免重新加密改变"最近修改"排序
+        """
+        table = Password.__table__
+        statement = (update(table)
+                     .where(table.c.id == bindparam("b_id"), table.c.encrypted_password == bindparam("b_old"))
+                     .values(encrypted_password=bindparam("b_encrypted"), updated_at=bindparam("b_updated_at")))
+        session.execute(statement, [
+            {"b_id": password_id, "b_old": old, "b_encrypted": new, "b_updated_at": updated_at}
+            for password_id, old, new, updated_at in values
+        ])
+    
+    @staticmethod
+    def _stored_form(token: bytes) -> Union[str, bytes]:
+        """批量加密结果的保存形式：紧凑格式保存为BLOB，Fernet令牌保存为文本"""
+        return token if EncryptionManager.is_compact(token) else token.decode()
+    
+    @staticmethod
+    def _raise_failed(result: Union[bytes, Exception]) -> bytes:
+        """批量加解密的结果是异常对象时抛出"""
+        if isinstance(result, Exception):
+            raise result
+        return result
+    
     def update_password(self, password_id: int, title: str = None, 
                        username: str = None, password: str = None,
                        category_id: int = None, notes: str = None,
@@ -67,13 +670,15 @@ class PasswordManager:
             db_password = session.query(Password).filter_by(id=password_id).first()
             if not db_password:
                 return None
+            old_category_id = db_password.category_id
             
             if title:
                 db_password.title = title
+                db_password.title_pinyin, db_password.title_initials = pinyin_keys(title)
             if username:
                 db_password.username = username
             if password:
-                db_password.encrypted_password = self.encryption_manager.encrypt(password)
+                db_password.encrypted_password = self.encryption_manager.encrypt_record(password, password_id)
             if category_id:
                 db_password.category_id = category_id
             if notes is not None:
@@ -90,6 +695,13 @@ class PasswordManager:
                 db_password.additional_params = additional_params
             
             session.commit()
+            if self.secret_cache:
+                self.secret_cache.invalidate(password_id)
+            category_deltas = None
+            if db_password.category_id != old_category_id:
+                category_deltas = {old_category_id: -1, db_password.category_id: 1}
+            self._after_write(updated=[PasswordSummary.from_password(db_password)],
+                              category_deltas=category_deltas)
             return db_password
         finally:
             session.close()
@@ -102,38 +714,197 @@ class PasswordManager:
             if password:
                 session.delete(password)
                 session.commit()
+                if self.secret_cache:
+                    self.secret_cache.invalidate(password_id)
+                self._after_write(removed=[password_id], category_deltas={password.category_id: -1})
                 return True
             return False
         finally:
             session.close()
     
-    def get_passwords_by_category(self, category_id: int) -> List[Password]:
-        """获取指定类别的所有密码"""
+    def get_passwords_by_category(self, category_id: int,
+                                  summary: bool = False) -> List[Union[Password, PasswordSummary]]:
+        """获取指定类别的所有密码
+        
+        列表查询不解密密码，需要明文时调用get_decrypted_password或decrypt_passwords
+        
+        Args:
+            category_id: 类别ID，-1表示全部
+            summary: 为True时只查询表格显示的列，返回PasswordSummary
+        """
         session = self.Session()
         try:
+            query = self._list_query(session, summary)
             # 如果category_id为-1，表示"全部"类别，返回所有密码
-            if category_id == -1:
-                passwords = session.query(Password).all()
-            else:
-                passwords = session.query(Password).filter_by(category_id=category_id).all()
-                
-            for password in passwords:
-                password.decrypted_password = self.encryption_manager.decrypt(password.encrypted_password)
-            return passwords
+            if category_id != -1:
+                query = query.filter(Password.category_id == category_id)
+            return self._fetch(query, summary)
         finally:
             session.close()
     
-    def search_passwords(self, query: str) -> List[Password]:
-        """搜索密码"""
+    def get_passwords_page(self, category_id: int, after_id: int = 0, limit: int = 500,
+                           summary: bool = True) -> List[Union[Password, PasswordSummary]]:
+        """按ID顺序获取一页密码（键集分页）
+        
+        Args:
+            category_id: 类别ID，-1表示全部
+            after_id: 只返回ID大于该值的记录，传入上一页最后一条的ID
+            limit: 每页条数
+            summary: 为True时返回PasswordSummary
+        """
         session = self.Session()
         try:
-            passwords = session.query(Password).filter(
-                (Password.title.ilike(f"%{query}%")) |
-                (Password.username.ilike(f"%{query}%")) |
-                (Password.notes.ilike(f"%{query}%"))
-            ).all()
-            for password in passwords:
-                password.decrypted_password = self.encryption_manager.decrypt(password.encrypted_password)
-            return passwords
+            query = self._list_query(session, summary).filter(Password.id > after_id)
+            if category_id != -1:
+                query = query.filter(Password.category_id == category_id)
+            return self._fetch(query.order_by(Password.id).limit(limit), summary)
         finally:
-            session.close() 
\ No newline at end of file
+            session.close()
+    
+    def count_passwords(self, category_id: int) -> int:
+        """统计指定类别的密码数量（使用类别索引，不读取记录内容）
+        
+        Args:
+            category_id: 类别ID，-1表示全部
+        """
+        session = self.Session()
+        try:
+            query = session.query(func.count(Password.id))
+            if category_id != -1:
+                query = query.filter(Password.category_id == category_id)
+            return query.scalar()
+        finally:
+            session.close()
+    
+    def iter_passwords(self, category_id: int, after_id: int = 0, limit: int = 500,
+                       summary: bool = True) -> Iterator[List[Union[Password, PasswordSummary]]]:
+        """逐页遍历指定类别的密码，每次只在内存中保留一页"""
+        while True:
+            page = self.get_passwords_page(category_id, after_id, limit, summary)
+            if page:
+                yield page
+            if len(page) < limit:
+                return
+            after_id = page[-1].id
+    
+    def search_passwords(self, query: str, summary: bool = False,
+                         fuzzy: bool = False) -> List[Union[Password, PasswordSummary]]:
+        """搜索密码（不解密）
+        
+        多个关键字用空格分隔，需同时匹配。长度不小于3的关键字走FTS5 trigram全文索引，
+        结果按相关度排序；更短的关键字（trigram无法索引）对搜索列做LIKE匹配。
+        纯字母的关键字还可以匹配标题拼音的前缀（"sjk"、"shuju"匹配"数据库"），拼音在写入时已计算好。
+        支持字段过滤（见src/utils/query_parser.py），例如 type:SSH host:10.20.* port:22 cat:生产，
+        过滤条件编译为connection_type/host/port/category_id上的SQL条件，可使用索引。
+        summary为True时返回的PasswordSummary带有search_text，可用matches()在内存中继续筛选。
+        已建立内存搜索索引且没有字段过滤时，摘要搜索直接由索引回答，不访问数据库。
+        fuzzy为True时按子序列模糊匹配并按相关度排序（需要内存搜索索引，未建立时或有字段过滤时退回普通搜索）。
+        """
+        parsed = parse_query(query)
+        search_index = self.search_index
+        if summary and search_index is not None and not parsed.filters:
+            if fuzzy:
+                return search_index.fuzzy_search(query)
+            return search_index.search(parsed.terms)
+        
+        session = self.Session()
+        try:
+            passwords = self._search_query(session, parsed, summary)
+            if summary:
+                return [PasswordSummary.from_search_row(row) for row in passwords]
+            return passwords.all()
+        finally:
+            session.close()
+    
+    def explain_search(self, query: str) -> str:
+        """说明搜索的执行方式：解析出的过滤条件、关键字和SQLite的查询计划（用于确认过滤条件是否使用了索引）"""
+        parsed = parse_query(query)
+        lines = [f"过滤条件: {field}={value}" for field, value in parsed.filters]
+        lines.append(f"关键字: {' '.join(parsed.terms) if parsed.terms else '(无)'}")
+        session = self.Session()
+        try:
+            compiled = self._search_query(session, parsed, summary=True).statement.compile(dialect=self.engine.dialect)
+            params = tuple(compiled.params[name] for name in compiled.positiontup)
+            plan = session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params)
+            lines.append("查询计划:")
+            lines.extend(f"  {row[-1]}" for row in plan)
+        finally:
+            session.close()
+        return "\n".join(lines)
+    
+    def _search_query(self, session: Session, parsed: ParsedQuery, summary: bool):
+        """构造搜索查询：字段过滤条件加上关键字的全文/LIKE匹配"""
+        if summary:
+            # 摘要结果额外带上搜索列，供界面在内存中对结果继续筛选
+            passwords = session.query(*PasswordSummary.SEARCH_COLUMNS)
+        else:
+            passwords = session.query(Password)
+        for predicate in compile_filters(parsed.filters):
+            passwords = passwords.filter(predicate)
+        
+        # 可能是拼音的关键字单独处理：搜索列匹配或标题拼音前缀匹配，满足其一即可
+        pinyin_terms = [term for term in parsed.terms if is_pinyin_term(term)]
+        terms = [term for term in parsed.terms if not is_pinyin_term(term)]
+        fts_terms = [term for term in terms if len(term) >= 3] if self.fts_enabled else []
+        like_terms = [term for term in terms if len(term) < 3] if self.fts_enabled else terms
+        
+        for term in pinyin_terms:
+            pattern = term.lower() + "*"
+            passwords = passwords.filter(or_(
+                self._text_predicate(term),
+                Password.title_pinyin.op("GLOB")(pattern),
+                Password.title_initials.op("GLOB")(pattern)
+            ))
+        
+        if fts_terms:
+            # 每个关键字作为短语匹配，双引号需要转义
+            match = " AND ".join('"' + term.replace('"', '""') + '"' for term in fts_terms)
+            passwords = passwords.join(PasswordFTS, PasswordFTS.c.rowid == Password.id).filter(
+                text("passwords_fts MATCH :match").bindparams(match=match)
+            ).order_by(PasswordFTS.c.rank)
+        
+        for term in like_terms:
+            passwords = passwords.filter(self._like_predicate(term))
+        return passwords
+    
+    def _text_predicate(self, term: str):
+        """单个关键字匹配搜索列的条件（能用全文索引时使用FTS子查询）"""
+        if self.fts_enabled and len(term) >= 3:
+            match = '"' + term.replace('"', '""') + '"'
+            return Password.id.in_(
+                select(PasswordFTS.c.rowid).where(literal_column("passwords_fts").op("MATCH")(match))
+            )
+        return self._like_predicate(term)
+    
+    @staticmethod
+    def _like_predicate(term: str):
+        """单个关键字对搜索列做LIKE匹配的条件"""
+        return or_(*(column.icontains(term, autoescape=True) for column in SEARCH_COLUMNS))
+    
+    def get_passwords_by_ids(self, password_ids: List[int]) -> List[Password]:
+        """按ID批量获取完整的密码记录，保持传入的顺序（用于从摘要行导出）"""
+        session = self.Session()
+        try:
+            passwords = {}
+            # 分批查询，避免超出SQLite的参数数量限制
+            for start in range(0, len(password_ids), 500):
+                chunk = password_ids[start:start + 500]
+                for password in session.query(Password).filter(Password.id.in_(chunk)):
+                    passwords[password.id] = password
+            return [passwords[pid] for pid in password_ids if pid in passwords]
+        finally:
+            session.close()
+    
+    @staticmethod
+    def _list_query(session: Session, summary: bool):
+        """构造列表查询，summary为True时只选择摘要列"""
+        if summary:
+            return session.query(*PasswordSummary.COLUMNS)
+        return session.query(Password)
+    
+    @staticmethod
+    def _fetch(query, summary: bool) -> list:
+        """执行列表查询，摘要查询的结果转换为PasswordSummary"""
+        if summary:
+            return [PasswordSummary.from_row(row) for row in query]
+        return query.all()
@@ -0,0 +1,108 @@
+"""
+搜索控制模块 - 边输入边搜索的防抖与结果复用
+"""
+from typing import List, Optional
+from PySide6.QtCore import QObject, QTimer, Signal
+from src.controllers.password_manager import PasswordManager
+from src.controllers.vault_worker import AsyncVault
+from src.models.password import PasswordSummary
+from src.utils.query_parser import ParsedQuery, parse_query
+
+
+class SearchController(QObject):
+    """搜索流水线
+
+    - 输入停止debounce_ms毫秒后才执行搜索，连续输入只搜索最后一次的内容
+    - 数据库搜索在后台执行，新搜索会取代尚未返回的旧搜索
+    - 新关键字是上一次关键字的延续（按解析后的关键字比较，见_refines）时，结果一定是上一次结果的子集，
+      直接在内存中筛选上一次的结果，不再查询数据库
+    - fuzzy为True时使用模糊搜索（结果按相关度重新排序，不复用上一次的结果）
+    - 带字段过滤（如host:10.20.*）的搜索每次都查询数据库，由索引完成过滤
+    """
+    resultsReady = Signal(str, list)  # (搜索内容, 结果)
+    searchFailed = Signal(str)
+
+    def __init__(self, password_manager: PasswordManager, vault: AsyncVault,
+                 debounce_ms: int = 250, parent: QObject = None):
+        super().__init__(parent)
+        self.password_manager = password_manager
+        self.vault = vault
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._run)
+        self.set_debounce(debounce_ms)
+        self._pending_query = ""
+        self._last_query: Optional[str] = None
+        self._last_parsed: Optional[ParsedQuery] = None
+        self._last_results: Optional[List[PasswordSummary]] = None
+        self.fuzzy = False
+
+    def set_debounce(self, debounce_ms: int):
+        """设置防抖间隔（毫秒）"""
+        self._timer.setInterval(debounce_ms)
+
+    def set_fuzzy(self, fuzzy: bool):
+        """切换模糊搜索，并重新搜索当前内容"""
+        self.fuzzy = fuzzy
+        self.reset()
+        if self._pending_query.strip():
+            self._timer.start()
+
+    def search(self, query: str):
+        """输入变化时调用，重新开始计时"""
+        self._pending_query = query
+        self._timer.start()
+
+    def cancel(self):
+        """取消等待中的搜索（例如搜索框被清空）"""
+        self._pending_query = ""
+        self._timer.stop()
+        self.vault.cancel("list")
+
+    def reset(self):
+        """丢弃缓存的上一次结果（数据变化后调用）"""
+        self._last_query = None
+        self._last_parsed = None
+        self._last_results = None
+
+    def _run(self):
+        query = self._pending_query
+        if not query.strip():
+            return
+
+        parsed = parse_query(query)
+        if not self.fuzzy and self._last_results is not None and self._refines(query, parsed):
+            # 在上一次的结果中筛选
+            results = [row for row in self._last_results if row.matches(parsed.terms)]
+            self.vault.cancel("list")
+            self._store(query, parsed, results)
+            return
+
+        self.vault.submit(
+            "list", self.password_manager.search_passwords, query, summary=True, fuzzy=self.fuzzy,
+            on_result=lambda results: self._store(query, parsed, results),
+            on_error=self.searchFailed.emit
+        )
+
+    def _refines(self, query: str, parsed: ParsedQuery) -> bool:
+        """新搜索的结果是否一定是上一次结果的子集
+
+        两次都没有字段过滤和未闭合的引号，且新关键字在上一次的基础上只延长最后一个关键字或增加关键字。
+        未闭合的引号（例如正在输入的"web）会被当作普通关键字，不能作为之后输入的基础
+        """
+        previous = self._last_parsed
+        if previous is None or previous.filters or parsed.filters:
+            return False
+        if self._last_query.count('"') % 2 or query.count('"') % 2:
+            return False
+        old_terms, new_terms = previous.terms, parsed.terms
+        if not old_terms or len(new_terms) < len(old_terms):
+            return False
+        last = len(old_terms) - 1
+        return new_terms[:last] == old_terms[:last] and new_terms[last].lower().startswith(old_terms[last].lower())
+
+    def _store(self, query: str, parsed: ParsedQuery, results: List[PasswordSummary]):
+        self._last_query = query
+        self._last_parsed = parsed
+        self._last_results = results
+        self.resultsReady.emit(query, results)
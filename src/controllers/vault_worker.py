@@ -0,0 +1,144 @@
+"""
+后台数据访问模块 - 在线程池中执行密码库操作，结果通过Qt信号回到界面线程
+"""
+import itertools
+import traceback
+from typing import Any, Callable, Dict, Optional, Tuple
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+from src.controllers.password_manager import PasswordManager
+
+
+class CancelToken:
+    """取消标记，后台任务在耗时循环中检查cancelled以提前结束"""
+
+    def __init__(self):
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class _TaskSignals(QObject):
+    """后台任务的信号（在工作线程发出，在界面线程处理）"""
+    finished = Signal(int, object)
+    failed = Signal(int, str)
+
+
+class _VaultTask(QRunnable):
+    """在线程池中执行的单个任务"""
+
+    def __init__(self, request_id: int, fn: Callable, args: tuple, kwargs: dict,
+                 token: CancelToken, signals: _TaskSignals, password_manager: PasswordManager):
+        super().__init__()
+        self.request_id = request_id
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.token = token
+        self.signals = signals
+        self.password_manager = password_manager
+
+    def run(self):
+        if self.token.cancelled:
+            return
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+            if not self.token.cancelled:
+                self.signals.finished.emit(self.request_id, result)
+        except Exception as e:
+            traceback.print_exc()
+            if not self.token.cancelled:
+                self.signals.failed.emit(self.request_id, str(e))
+        finally:
+            # 释放当前工作线程的数据库会话
+            self.password_manager.Session.remove()
+
+
+class AsyncVault(QObject):
+    """密码库的异步门面
+
+    submit()把查询、解密、导入等操作放到后台线程执行，完成后在界面线程调用回调。
+    同一个key同时只保留最新的请求：提交新请求时旧请求被取消，
+    旧请求即使已经在执行，其结果也会被丢弃（例如过期的搜索）。
+    密码库的写入通知（PasswordChanges）通过changed信号转到界面线程。
+    """
+    changed = Signal(object)
+
+    def __init__(self, password_manager: PasswordManager, parent: QObject = None, max_threads: int = 4):
+        super().__init__(parent)
+        self.password_manager = password_manager
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(max_threads)
+        self._signals = _TaskSignals(self)
+        self._signals.finished.connect(self._on_finished)
+        self._signals.failed.connect(self._on_failed)
+        self._request_ids = itertools.count(1)
+        self._pending: Dict[int, Tuple[str, Optional[Callable], Optional[Callable]]] = {}
+        self._latest: Dict[str, Tuple[int, CancelToken]] = {}
+        # 写入可能发生在任意线程，信号跨线程时自动排队到界面线程
+        self._forward_changes = self.changed.emit
+        self.password_manager.add_change_listener(self._forward_changes)
+
+    def submit(self, key: str, fn: Callable, *args: Any,
+               on_result: Callable[[Any], None] = None,
+               on_error: Callable[[str], None] = None, **kwargs: Any) -> int:
+        """提交后台任务
+
+        Args:
+            key: 请求类别，同一类别的新请求会取代旧请求
+            fn: 在后台线程执行的函数，fn(*args, **kwargs)
+            on_result: 成功时在界面线程调用，参数为fn的返回值
+            on_error: 失败时在界面线程调用，参数为错误信息
+
+        Returns:
+            int: 请求ID
+        """
+        self.cancel(key)
+        request_id = next(self._request_ids)
+        token = CancelToken()
+        self._latest[key] = (request_id, token)
+        self._pending[request_id] = (key, on_result, on_error)
+        self.thread_pool.start(_VaultTask(request_id, fn, args, kwargs, token,
+                                          self._signals, self.password_manager))
+        return request_id
+
+    def cancel(self, key: str):
+        """取消某一类别正在等待或执行的请求"""
+        latest = self._latest.pop(key, None)
+        if latest:
+            request_id, token = latest
+            token.cancel()
+            self._pending.pop(request_id, None)
+
+    def is_running(self, key: str) -> bool:
+        """某一类别是否有未完成的请求"""
+        return key in self._latest
+
+    def wait(self, msecs: int = -1) -> bool:
+        """等待所有后台任务结束"""
+        return self.thread_pool.waitForDone(msecs)
+
+    def close(self, msecs: int = -1) -> bool:
+        """停止接收写入通知并等待后台任务结束（窗口关闭时调用）"""
+        self.password_manager.remove_change_listener(self._forward_changes)
+        return self.wait(msecs)
+
+    def _take(self, request_id: int):
+        """取出请求的回调，过期或已取消的请求返回None"""
+        pending = self._pending.pop(request_id, None)
+        if pending is None:
+            return None
+        key = pending[0]
+        if self._latest.get(key, (None,))[0] == request_id:
+            del self._latest[key]
+        return pending
+
+    def _on_finished(self, request_id: int, result: Any):
+        pending = self._take(request_id)
+        if pending and pending[1]:
+            pending[1](result)
+
+    def _on_failed(self, request_id: int, message: str):
+        pending = self._take(request_id)
+        if pending and pending[2]:
+            pending[2](message)
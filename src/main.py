@@ -45,10 +45,8 @@ def main():
     # 先显示登录对话框
     login_dialog = LoginDialog()
     if login_dialog.exec():
-        # 登录成功，显示主窗口
+        # 登录成功，显示主窗口（与登录对话框共享同一个已初始化的密码管理器）
         window = MainWindow()
-        # 传递加密管理器
-        window.password_manager.encryption_manager = login_dialog.password_manager.encryption_manager
         window.show()
         
         sys.exit(app.exec())
@@ -9,6 +9,9 @@ class Category(Base):
     name = Column(String(50), nullable=False, unique=True)
     description = Column(String(200))
     icon = Column(String(50))  # 图标文件名
+    # 名称的拼音搜索键（写入时由src/utils/pinyin.py计算），用于cat:拼音过滤
+    name_pinyin = Column(String(300))
+    name_initials = Column(String(50))
     
     # 关系
     passwords = relationship("Password", back_populates="category")
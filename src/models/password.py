@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, table, column
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 
@@ -11,6 +11,7 @@ class Password(Base):
     id = Column(Integer, primary_key=True)
     title = Column(String(100), nullable=False)
     username = Column(String(100), nullable=False)
+    # Fernet令牌（文本）或紧凑格式密文（BLOB，见EncryptionManager.encrypt_record），SQLite按值保存类型
     encrypted_password = Column(String(500), nullable=False)
     category_id = Column(Integer, ForeignKey('categories.id'))
     notes = Column(String(500))
@@ -21,11 +22,99 @@ class Password(Base):
     connection_type = Column(String(50))  # 连接类型（RDP、SSH等）
     additional_params = Column(String(500))  # 额外参数
     
+    # 标题的拼音搜索键（写入时由src/utils/pinyin.py计算），搜索时做前缀匹配
+    title_pinyin = Column(String(300))  # 全拼，如"shujuku"
+    title_initials = Column(String(100))  # 首字母，如"sjk"
+    
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # 关系
     category = relationship("Category", back_populates="passwords")
     
+    # 索引（已有数据库由src/utils/migrations.py补建）
+    __table_args__ = (
+        Index("ix_passwords_category_id", "category_id"),
+        Index("ix_passwords_category_title", "category_id", "title"),
+        Index("ix_passwords_host", "host"),
+        Index("ix_passwords_updated_at", "updated_at"),
+        Index("ix_passwords_connection_type", "connection_type"),
+        Index("ix_passwords_port", "port"),
+        Index("ix_passwords_title_pinyin", "title_pinyin"),
+        Index("ix_passwords_title_initials", "title_initials"),
+    )
+    
+    def __repr__(self):
+        return f"<Password(title='{self.title}', username='{self.username}')>"
+
+
+# FTS5全文索引虚拟表（由src/utils/migrations.py创建，不属于ORM模型）
+PasswordFTS = table("passwords_fts", column("rowid"), column("rank"))
+
+# 全文搜索覆盖的列，不支持FTS时对这些列做LIKE匹配
+SEARCH_COLUMNS = (Password.title, Password.username, Password.notes,
+                  Password.host, Password.additional_params)
+
+
+def build_search_text(*fields) -> str:
+    """把搜索列拼接成小写文本，用于在内存中判断关键字是否匹配（列之间用换行分隔，避免跨列匹配）"""
+    return "\n".join(str(field) for field in fields if field).lower()
+
+
+class PasswordSummary:
+    """密码列表的轻量记录，只包含表格显示所需的列"""
+    __slots__ = ("id", "title", "username", "connection_type", "host", "port", "category_id",
+                 "search_text", "updated_at", "pinyin_keys")
+    
+    # 查询摘要时选择的列，顺序与__slots__一致
+    COLUMNS = (Password.id, Password.title, Password.username, Password.connection_type,
+               Password.host, Password.port, Password.category_id)
+    # 搜索时额外选择的列（见from_search_row）
+    SEARCH_COLUMNS = COLUMNS + (Password.notes, Password.additional_params, Password.updated_at,
+                                Password.title_pinyin, Password.title_initials)
+    
+    def __init__(self, id, title, username, connection_type=None, host=None, port=None, category_id=None,
+                 search_text=None):
+        self.id = id
+        self.title = title
+        self.username = username
+        self.connection_type = connection_type
+        self.host = host
+        self.port = port
+        self.category_id = category_id
+        self.search_text = search_text  # 搜索结果才有，用于在内存中继续筛选
+        self.updated_at = None  # 搜索结果才有，用于模糊搜索的新近度排序
+        self.pinyin_keys = ()  # 搜索结果才有，标题的(全拼, 首字母)
+    
+    @classmethod
+    def from_row(cls, row):
+        """从查询结果行创建摘要记录"""
+        return cls(*row)
+    
+    @classmethod
+    def from_search_row(cls, row):
+        """从搜索结果行（SEARCH_COLUMNS）创建摘要记录"""
+        summary = cls(*row[:len(cls.COLUMNS)])
+        notes, additional_params, summary.updated_at, title_pinyin, title_initials = row[len(cls.COLUMNS):]
+        summary.search_text = build_search_text(summary.title, summary.username, notes,
+                                                summary.host, additional_params)
+        summary.pinyin_keys = tuple(key for key in (title_pinyin, title_initials) if key)
+        return summary
+    
+    @classmethod
+    def from_password(cls, password):
+        """从刚写入的密码记录（或带有相同属性的对象）创建带搜索列的摘要记录，不需要再查询数据库"""
+        return cls.from_search_row([getattr(password, column.key) for column in cls.SEARCH_COLUMNS])
+    
+    def matches(self, terms) -> bool:
+        """是否匹配所有关键字（需要search_text）：搜索列包含关键字，或纯字母关键字是标题拼音的前缀"""
+        return all(self.matches_term(term.lower()) for term in terms)
+    
+    def matches_term(self, term: str) -> bool:
+        """是否匹配单个小写关键字（与数据库搜索的规则一致）"""
+        if term in self.search_text:
+            return True
+        return term.isascii() and term.isalpha() and any(key.startswith(term) for key in self.pinyin_keys)
+    
     def __repr__(self):
-        return f"<Password(title='{self.title}', username='{self.username}')>" 
\ No newline at end of file
+        return f"<PasswordSummary(title='{self.title}', username='{self.username}')>"
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String
+from src.models.password import Base
+
+class VaultMeta(Base):
+    """密码库的内部状态（键值对），例如密钥轮换的检查点"""
+    __tablename__ = 'vault_meta'
+
+    key = Column(String(50), primary_key=True)
+    value = Column(String(200))
+
+    def __repr__(self):
+        return f"<VaultMeta(key='{self.key}', value='{self.value}')>"
@@ -0,0 +1,73 @@
+"""
+数据库工具模块 - 创建带SQLite性能配置的数据库引擎
+"""
+from typing import Dict, Union
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+
+# SQLite连接配置（每个新连接建立时通过PRAGMA应用）
+#
+# default: 默认配置，适合以读取为主、偶尔批量导入的密码库
+#   - WAL日志模式：读写互不阻塞，写入只追加到WAL文件
+#   - synchronous=NORMAL：WAL模式下只在检查点时fsync，断电最多丢失最后几次提交，不会损坏数据库
+#   - 64MB页缓存、256MB内存映射、临时表放在内存中
+# durable: 持久优先配置，适合放在网络盘/同步盘上的密码库（WAL不支持网络文件系统）
+#   - 回滚日志模式 + synchronous=FULL：每次提交都fsync，提交成功即落盘
+ENGINE_PROFILES: Dict[str, Dict[str, Union[str, int]]] = {
+    "default": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -64000,       # 负数表示KB，约64MB
+        "mmap_size": 268435456,     # 256MB
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,       # 毫秒
+    },
+    "durable": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "cache_size": -16000,
+        "mmap_size": 0,
+        "temp_store": "MEMORY",
+        "busy_timeout": 10000,
+    },
+}
+
+DEFAULT_DB_URL = "sqlite:///passwords.db"
+
+
+def create_vault_engine(db_url: str = DEFAULT_DB_URL,
+                        profile: Union[str, Dict[str, Union[str, int]]] = "default") -> Engine:
+    """创建密码库数据库引擎
+
+    Args:
+        db_url: 数据库URL
+        profile: ENGINE_PROFILES中的配置名称，或自定义的PRAGMA字典
+
+    Returns:
+        Engine: 已注册连接事件的数据库引擎
+    """
+    if isinstance(profile, str):
+        if profile not in ENGINE_PROFILES:
+            raise ValueError(f"未知的数据库配置: {profile}")
+        pragmas = ENGINE_PROFILES[profile]
+    else:
+        pragmas = profile
+
+    connect_args = {}
+    if db_url.startswith("sqlite"):
+        # 连接池中的连接会在不同线程间复用，每个线程同一时间只使用自己的会话
+        connect_args["check_same_thread"] = False
+    engine = create_engine(db_url, connect_args=connect_args)
+
+    if engine.dialect.name == "sqlite":
+        @event.listens_for(engine, "connect")
+        def apply_pragmas(dbapi_connection, connection_record):
+            """每个新连接建立时应用PRAGMA配置"""
+            cursor = dbapi_connection.cursor()
+            try:
+                for name, value in pragmas.items():
+                    cursor.execute(f"PRAGMA {name}={value}")
+            finally:
+                cursor.close()
+
+    return engine
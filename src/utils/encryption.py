@@ -1,32 +1,88 @@
-from cryptography.fernet import Fernet
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence, Tuple, Union
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet, InvalidToken
 from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 import base64
 import os
+import struct
+import threading
+from src.utils.kdf import KdfParams, LEGACY_PARAMS, derive_key
+
+BATCH_CHUNK_SIZE = 256  # 批量加解密时每个线程任务处理的条数
+
+# 紧凑密文格式：版本(1字节) + nonce(12字节) + AES-GCM密文和认证标签(16字节)，以BLOB保存，
+# 记录ID作为关联数据，密文被复制到其他记录时无法解密
+RECORD_VERSION_AESGCM = 1
+RECORD_NONCE_SIZE = 12
+_RECORD_KEY_INFO = b"LovelyPassword record v1"
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """批量加解密共用的线程池（cryptography的底层运算不持有GIL，可以多核并行）"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1,
+                                           thread_name_prefix="crypto")
+        return _executor
+
+
+def _apply_each(fn: Callable[[bytes], bytes], items: Sequence[bytes]) -> List[Union[bytes, Exception]]:
+    """逐条处理，单条失败时在该位置返回异常对象"""
+    results = []
+    for item in items:
+        try:
+            results.append(fn(item))
+        except Exception as e:
+            results.append(e)
+    return results
+
 
 class EncryptionManager:
     def __init__(self):
         self.key = None
         self.cipher_suite = None
+        self.record_cipher = None
+        # 密钥轮换期间旧数据密钥的(Fernet, AESGCM)，当前密钥解密失败时依次尝试
+        self.previous_ciphers = []
+        # 为True时新密文使用紧凑格式（AES-GCM），否则使用Fernet；两种格式都可以解密
+        self.compact_records = False
     
-    def generate_key_from_password(self, password: str, salt: bytes = None) -> bytes:
-        """从主密码生成加密密钥"""
+    def generate_key_from_password(self, password: str, salt: bytes = None,
+                                   params: KdfParams = LEGACY_PARAMS) -> bytes:
+        """从主密码生成加密密钥
+        
+        Args:
+            params: 密钥派生参数（见src.utils.kdf），默认为旧版本的PBKDF2参数
+        """
         if salt is None:
             salt = os.urandom(16)
         
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=100000,
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(password.encode()))
+        key = base64.urlsafe_b64encode(derive_key(password, salt, params))
         return key, salt
     
     def initialize(self, key: bytes):
         """初始化加密管理器"""
         self.key = key
-        self.cipher_suite = Fernet(self.key)
+        self.cipher_suite, self.record_cipher = self._ciphers(key)
+    
+    def set_previous_keys(self, keys: Sequence[bytes]):
+        """设置密钥轮换前的旧数据密钥，尚未用当前密钥重新加密的记录仍可解密（为空时不再尝试旧密钥）"""
+        self.previous_ciphers = [self._ciphers(key) for key in keys]
+    
+    @staticmethod
+    def _ciphers(key: bytes) -> Tuple[Fernet, AESGCM]:
+        """数据密钥对应的Fernet和AES-GCM加密器"""
+        # 紧凑格式使用从主密钥派生的独立子密钥
+        record_key = HKDF(algorithm=hashes.SHA256(), length=32, salt=None,
+                          info=_RECORD_KEY_INFO).derive(base64.urlsafe_b64decode(key))
+        return Fernet(key), AESGCM(record_key)
     
     def encrypt(self, data: str) -> str:
         """加密数据"""
@@ -40,6 +96,97 @@ class EncryptionManager:
             raise RuntimeError("Encryption manager not initialized")
         return self.cipher_suite.decrypt(encrypted_data.encode()).decode()
     
+    def encrypt_record(self, data: str, record_id: int) -> Union[str, bytes]:
+        """加密一条密码记录的密码，compact_records为True时返回紧凑格式（bytes），否则返回Fernet令牌（str）"""
+        result = self._seal(record_id, data.encode())
+        return result if self.compact_records else result.decode()
+    
+    def decrypt_record(self, value: Union[str, bytes], record_id: int) -> str:
+        """解密一条密码记录的密码（自动识别紧凑格式和Fernet令牌）"""
+        return self._open(record_id, value).decode()
+    
+    def encrypt_records(self, items: Sequence[Tuple[int, bytes]],
+                        compact: Optional[bool] = None) -> List[Union[bytes, Exception]]:
+        """批量加密(记录ID, 明文)，格式同encrypt_record（Fernet令牌也以bytes返回）
+        
+        Args:
+            compact: 使用的密文格式，为None时按compact_records
+        """
+        return self._map_many(lambda item: self._seal(*item, compact=compact), items)
+    
+    def decrypt_records(self, items: Sequence[Tuple[int, Union[str, bytes]]]) -> List[Union[bytes, Exception]]:
+        """批量解密(记录ID, 密文)，失败的条目在对应位置返回异常对象"""
+        return self._map_many(lambda item: self._open(*item), items)
+    
+    @staticmethod
+    def is_compact(value: Union[str, bytes]) -> bool:
+        """密文是否为紧凑格式"""
+        return isinstance(value, bytes) and value[:1] == bytes([RECORD_VERSION_AESGCM])
+    
+    @staticmethod
+    def _associated_data(record_id: int) -> bytes:
+        return struct.pack(">BQ", RECORD_VERSION_AESGCM, record_id)
+    
+    def _seal(self, record_id: int, data: bytes, compact: Optional[bool] = None) -> bytes:
+        if not self.cipher_suite:
+            raise RuntimeError("Encryption manager not initialized")
+        if not (self.compact_records if compact is None else compact):
+            return self.cipher_suite.encrypt(data)
+        nonce = os.urandom(RECORD_NONCE_SIZE)
+        return (bytes([RECORD_VERSION_AESGCM]) + nonce
+                + self.record_cipher.encrypt(nonce, data, self._associated_data(record_id)))
+    
+    def _open(self, record_id: int, value: Union[str, bytes]) -> bytes:
+        if not self.cipher_suite:
+            raise RuntimeError("Encryption manager not initialized")
+        try:
+            return self._open_with(self.cipher_suite, self.record_cipher, record_id, value)
+        except (InvalidToken, InvalidTag):
+            # 密钥轮换期间尚未重新加密的记录
+            for cipher_suite, record_cipher in self.previous_ciphers:
+                try:
+                    return self._open_with(cipher_suite, record_cipher, record_id, value)
+                except (InvalidToken, InvalidTag):
+                    continue
+            raise
+    
+    def _open_with(self, cipher_suite: Fernet, record_cipher: AESGCM, record_id: int,
+                   value: Union[str, bytes]) -> bytes:
+        if self.is_compact(value):
+            nonce = value[1:1 + RECORD_NONCE_SIZE]
+            return record_cipher.decrypt(nonce, value[1 + RECORD_NONCE_SIZE:], self._associated_data(record_id))
+        return cipher_suite.decrypt(value)
+    
+    def encrypt_many(self, items: Sequence[bytes]) -> List[Union[bytes, Exception]]:
+        """批量加密（导入、重新加密等）
+        
+        按顺序返回密文；某一条失败时该位置是异常对象，不影响其他条目
+        """
+        if not self.cipher_suite:
+            raise RuntimeError("Encryption manager not initialized")
+        return self._map_many(self.cipher_suite.encrypt, items)
+    
+    def decrypt_many(self, tokens: Sequence[bytes]) -> List[Union[bytes, Exception]]:
+        """批量解密（导出、重新加密等）
+        
+        按顺序返回明文；某一条失败（例如密文损坏）时该位置是异常对象，不影响其他条目
+        """
+        if not self.cipher_suite:
+            raise RuntimeError("Encryption manager not initialized")
+        return self._map_many(self.cipher_suite.decrypt, tokens)
+    
+    @staticmethod
+    def _map_many(fn: Callable[[bytes], bytes], items: Sequence[bytes]) -> List[Union[bytes, Exception]]:
+        """把条目分块后在线程池中并行处理，结果按原顺序拼接"""
+        items = list(items)
+        if len(items) <= BATCH_CHUNK_SIZE:
+            return _apply_each(fn, items)
+        chunks = [items[start:start + BATCH_CHUNK_SIZE] for start in range(0, len(items), BATCH_CHUNK_SIZE)]
+        results = []
+        for chunk_results in _get_executor().map(_apply_each, [fn] * len(chunks), chunks):
+            results.extend(chunk_results)
+        return results
+    
     def verify_password(self, password: str, stored_hash: str) -> bool:
         """验证密码"""
         key, _ = self.generate_key_from_password(password)
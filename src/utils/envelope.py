@@ -0,0 +1,106 @@
+"""
+信封加密模块 - 密码库数据由随机生成的数据密钥加密，数据密钥再由主密码派生的密钥加密后保存在config.json中
+
+修改主密码只需要重新加密32字节的数据密钥，不需要重新加密所有记录；
+更换数据密钥（密钥轮换，见src/controllers/key_rotation.py）需要重新加密所有记录，
+轮换完成前旧数据密钥同样被主密码加密保存在"previous_wrapped_keys"中，尚未重新加密的记录仍可解密
+"""
+import base64
+import os
+from typing import List, Optional, Sequence, Tuple
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from src.utils.kdf import KdfParams, derive_key
+
+_WRAP_NONCE_SIZE = 12
+_WRAP_ASSOCIATED_DATA = b"LovelyPassword data key v1"
+_PREVIOUS_KEYS = "previous_wrapped_keys"
+
+
+def generate_data_key() -> bytes:
+    """生成新的数据密钥（Fernet密钥格式，EncryptionManager.initialize直接使用）"""
+    return Fernet.generate_key()
+
+
+def wrap_key(data_key: bytes, wrapping_key: bytes) -> str:
+    """用主密码派生的32字节密钥加密数据密钥，返回可保存到config.json的文本"""
+    nonce = os.urandom(_WRAP_NONCE_SIZE)
+    sealed = AESGCM(wrapping_key).encrypt(nonce, data_key, _WRAP_ASSOCIATED_DATA)
+    return base64.b64encode(nonce + sealed).decode()
+
+
+def unwrap_key(wrapped: str, wrapping_key: bytes) -> Optional[bytes]:
+    """解密数据密钥，主密码不正确时返回None"""
+    raw = base64.b64decode(wrapped)
+    try:
+        return AESGCM(wrapping_key).decrypt(raw[:_WRAP_NONCE_SIZE], raw[_WRAP_NONCE_SIZE:], _WRAP_ASSOCIATED_DATA)
+    except InvalidTag:
+        return None
+
+
+def is_wrapped(config: dict) -> bool:
+    """配置是否已使用信封加密（旧配置中保存的是主密码派生的密钥本身）"""
+    return "wrapped_key" in config
+
+
+def is_rotating(config: dict) -> bool:
+    """是否有未完成的密钥轮换（配置中还保存着旧数据密钥）"""
+    return bool(config.get(_PREVIOUS_KEYS))
+
+
+def unlock_keys(config: dict, password: str) -> Optional[List[bytes]]:
+    """用主密码取得[当前数据密钥, 旧数据密钥...]，主密码不正确时返回None（耗时操作，请在后台线程调用）
+
+    只有密钥轮换未完成时才有旧数据密钥；
+    旧配置没有被加密的数据密钥，数据由主密码派生的密钥直接加密，该密钥即数据密钥
+    """
+    params = KdfParams.from_config(config.get("kdf"))
+    derived = derive_key(password, bytes.fromhex(config["salt"]), params)
+    if not is_wrapped(config):
+        legacy_key = base64.urlsafe_b64encode(derived)
+        return [legacy_key] if legacy_key.decode() == config.get("key") else None
+    data_key = unwrap_key(config["wrapped_key"], derived)
+    if data_key is None:
+        return None
+    previous_keys = [unwrap_key(wrapped, derived) for wrapped in config.get(_PREVIOUS_KEYS, [])]
+    if None in previous_keys:
+        raise ValueError("配置文件中的旧数据密钥已损坏")
+    return [data_key] + previous_keys
+
+
+def unlock(config: dict, password: str) -> Optional[bytes]:
+    """用主密码取得当前数据密钥，主密码不正确时返回None（耗时操作，请在后台线程调用）"""
+    keys = unlock_keys(config, password)
+    return keys[0] if keys else None
+
+
+def seal_config(config: dict, data_key: bytes, password: str, params: KdfParams,
+                previous_keys: Sequence[bytes] = ()) -> dict:
+    """生成用主密码（新的盐和派生参数）加密数据密钥后的配置，config中的其他设置保持不变
+
+    previous_keys为密钥轮换期间仍需要的旧数据密钥，为空时配置中不保存旧密钥；
+    旧配置中明文保存的派生密钥（"key"）会被移除
+    """
+    salt = os.urandom(16)
+    wrapping_key = derive_key(password, salt, params)
+    new_config = {name: value for name, value in config.items() if name not in ("key", _PREVIOUS_KEYS)}
+    new_config.update(
+        salt=salt.hex(),
+        kdf=params.to_config(),
+        wrapped_key=wrap_key(data_key, wrapping_key),
+    )
+    if previous_keys:
+        new_config[_PREVIOUS_KEYS] = [wrap_key(key, wrapping_key) for key in previous_keys]
+    return new_config
+
+
+def drop_previous_keys(config: dict) -> dict:
+    """密钥轮换完成后，生成删除了旧数据密钥的配置"""
+    return {name: value for name, value in config.items() if name != _PREVIOUS_KEYS}
+
+
+def create(password: str, params: KdfParams) -> Tuple[dict, bytes]:
+    """创建新密码库的配置，返回(配置, 数据密钥)"""
+    data_key = generate_data_key()
+    return seal_config({}, data_key, password, params), data_key
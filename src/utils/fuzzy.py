@@ -0,0 +1,148 @@
+"""
+模糊搜索模块 - 子序列匹配与相关度评分
+"""
+import bisect
+import re
+import unicodedata
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+STALE_REBUILD_MIN = 1000  # 主文本中过期行超过该数量（且超过总行数的1/4）时整体重建
+
+
+def normalize_key(text: str) -> str:
+    """统一为半角小写（NFKC把全角字母数字转换为半角），用于模糊匹配"""
+    return unicodedata.normalize("NFKC", text).lower()
+
+
+def subsequence_pattern(query: str) -> Optional["re.Pattern"]:
+    """把关键字编译为子序列正则，例如"pdb"匹配"p...d...b"（不跨行）
+
+    每个字符前的字符集排除该字符本身，匹配到的是每个字符第一次出现的位置，不会产生大量回溯
+    """
+    chars = [char for char in normalize_key(query) if not char.isspace()]
+    if not chars:
+        return None
+    parts = [re.escape(chars[0])]
+    for char in chars[1:]:
+        parts.append(f"[^\\n{re.escape(char)}]*{re.escape(char)}")
+    return re.compile("".join(parts))
+
+
+class FuzzyMatcher:
+    """对预先计算好的匹配键做模糊搜索
+
+    所有记录的匹配键按修改时间从新到旧用换行拼接成一个字符串，由正则引擎在C层面扫描，
+    先找连续匹配（子串），再找子序列匹配，候选数达到上限后停止扫描（较新的记录优先）。
+    匹配键在记录写入时计算，搜索时不再重复计算。
+    排序依次比较：是否连续匹配、匹配跨度（越紧凑越好）、匹配开始位置（越靠前越好）、修改时间（越新越好）。
+
+    建立后新增和修改的记录放在单独的"最近"文本中（通常只有几条，搜索时重新拼接），
+    主文本中被修改和删除的行只标记为过期、扫描时跳过，过期行较多时才在下一次搜索时整体重建。
+    """
+
+    def __init__(self):
+        self._keys: Dict[int, str] = {}
+        self._updated_at: Dict[int, float] = {}
+        self._text = ""
+        self._line_starts: List[int] = []
+        self._line_ids: List[int] = []
+        self._dirty = True
+        self._stale: Set[int] = set()  # 主文本中已过期的行（记录被修改或删除）
+        self._recent: Set[int] = set()  # 主文本建立后新增或修改的记录
+        self._recent_text = ""
+        self._recent_starts: List[int] = []
+        self._recent_ids: List[int] = []
+        self._recent_dirty = False
+
+    def set(self, password_id: int, key: str, updated_at: Optional[datetime] = None):
+        """设置记录的匹配键（key应已经过normalize_key）"""
+        self._keys[password_id] = key.replace("\n", " ")
+        self._updated_at[password_id] = updated_at.timestamp() if updated_at else 0.0
+        if not self._dirty:
+            self._stale.add(password_id)
+            self._recent.add(password_id)
+            self._changed()
+
+    def remove(self, password_id: int):
+        if self._keys.pop(password_id, None) is not None:
+            self._updated_at.pop(password_id, None)
+            if not self._dirty:
+                self._stale.add(password_id)
+                self._recent.discard(password_id)
+                self._changed()
+
+    def _changed(self):
+        """记录变化后只需重新拼接最近文本，过期行过多时整体重建"""
+        self._recent_dirty = True
+        if len(self._stale) > max(STALE_REBUILD_MIN, len(self._line_ids) // 4):
+            self._dirty = True
+
+    def _rebuild(self):
+        """整体重新拼接匹配文本"""
+        self._line_ids, self._line_starts, self._text = self._join(self._keys)
+        self._stale.clear()
+        self._recent.clear()
+        self._recent_ids, self._recent_starts, self._recent_text = [], [], ""
+        self._dirty = False
+        self._recent_dirty = False
+
+    def _join(self, password_ids: Iterable[int]) -> Tuple[List[int], List[int], str]:
+        """按修改时间从新到旧拼接匹配键，返回(每行的密码ID, 每行的开始位置, 文本)"""
+        line_ids = sorted(password_ids, key=self._updated_at.__getitem__, reverse=True)
+        line_starts = []
+        position = 0
+        for password_id in line_ids:
+            line_starts.append(position)
+            position += len(self._keys[password_id]) + 1
+        return line_ids, line_starts, "\n".join(self._keys[password_id] for password_id in line_ids)
+
+    def search(self, query: str, limit: int = 500, max_candidates: int = None) -> List[int]:
+        """模糊搜索
+
+        Args:
+            query: 关键字（空格被忽略）
+            limit: 最多返回的条数
+            max_candidates: 每轮扫描最多收集的候选数，默认为limit的4倍
+
+        Returns:
+            list: 按匹配质量排序的密码ID
+        """
+        pattern = subsequence_pattern(query)
+        if pattern is None:
+            return []
+        if self._dirty:
+            self._rebuild()
+        elif self._recent_dirty:
+            self._recent_ids, self._recent_starts, self._recent_text = self._join(self._recent)
+            self._recent_dirty = False
+        if max_candidates is None:
+            max_candidates = limit * 4
+
+        compact = "".join(char for char in normalize_key(query) if not char.isspace())
+        literal = re.compile(re.escape(compact))
+        # 最近文本的记录较新，先扫描；主文本中的行号排在其后
+        segments = ((self._recent_text, self._recent_starts, self._recent_ids, 0, ()),
+                    (self._text, self._line_starts, self._line_ids, len(self._recent_ids), self._stale))
+        candidates = {}
+        for tier, regex in ((0, literal), (1, pattern)):
+            found = 0
+            for text, line_starts, line_ids, line_offset, stale in segments:
+                for match in regex.finditer(text):
+                    line = bisect.bisect_right(line_starts, match.start()) - 1
+                    password_id = line_ids[line]
+                    if password_id in candidates or password_id in stale:
+                        continue
+                    start = match.start() - line_starts[line]
+                    candidates[password_id] = (tier, match.end() - match.start(), start, line_offset + line)
+                    found += 1
+                    if found >= max_candidates:
+                        break
+                if found >= max_candidates:
+                    break
+
+        ranked = sorted(candidates, key=candidates.__getitem__)
+        return ranked[:limit]
+
+    def __len__(self):
+        return len(self._keys)
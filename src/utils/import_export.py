@@ -70,9 +70,10 @@ class ImportExportManager:
                     return 0, 0, f"导入文件缺少必要的列: {col}"
             
             # 开始导入
-            success_count = 0
             fail_count = 0
             errors = []
+            rows = []
+            row_numbers = []  # 批量记录序号对应的Excel行号
             
             for _, row in df.iterrows():
                 try:
@@ -97,20 +98,20 @@ class ImportExportManager:
                     connection_type = row.get("连接类型", None)
                     additional_params = row.get("附加参数", None)
                     
-                    # 添加密码
+                    # 收集待导入的密码
                     if title and username and password:
-                        password_manager.add_password(
-                            title=title,
-                            username=username,
-                            password=password,
-                            category_id=category_id,
-                            notes=notes,
-                            host=host,
-                            port=port,
-                            connection_type=connection_type,
-                            additional_params=additional_params
-                        )
-                        success_count += 1
+                        rows.append({
+                            "title": title,
+                            "username": username,
+                            "password": password,
+                            "category_id": category_id,
+                            "notes": notes,
+                            "host": host,
+                            "port": port,
+                            "connection_type": connection_type,
+                            "additional_params": additional_params
+                        })
+                        row_numbers.append(_ + 2)
                     else:
                         fail_count += 1
                         errors.append(f"行 {_ + 2}: 缺少必要字段(标题/用户名/密码)")
@@ -118,6 +119,12 @@ class ImportExportManager:
                     fail_count += 1
                     errors.append(f"行 {_ + 2}: {str(e)}")
             
+            # 批量导入，每批一个事务
+            success_count, bulk_errors = password_manager.add_passwords_bulk(rows)
+            fail_count += len(bulk_errors)
+            for index, message in bulk_errors:
+                errors.append(f"行 {row_numbers[index]}: {message}")
+            
             error_message = "\n".join(errors[:10])  # 只显示前10个错误
             if len(errors) > 10:
                 error_message += f"\n... 还有 {len(errors) - 10} 个错误未显示"
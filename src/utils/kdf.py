@@ -0,0 +1,131 @@
+"""
+密钥派生模块 - 从主密码派生加密密钥
+
+创建密码库时按本机速度校准派生参数（使解锁耗时接近TARGET_SECONDS），
+参数保存在config.json的"kdf"中；没有"kdf"的旧密码库使用LEGACY_PARAMS
+"""
+import statistics
+import time
+from typing import NamedTuple, Optional
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.argon2 import Argon2id
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
+
+KEY_LENGTH = 32
+DEFAULT_ALGORITHM = "argon2id"
+TARGET_SECONDS = 0.5  # 目标解锁耗时（秒）
+MIN_SAMPLE_SECONDS = 0.1  # 校准时单次测量的最短耗时，太短时计时误差占比过大
+CALIBRATION_RUNS = 3  # 校准时每个强度的测量次数（取中位数）
+OVERSHOOT_TOLERANCE = 1.2  # 实测耗时超过目标的该倍数时按比例降低强度
+
+ARGON2_MEMORY_COST = 64 * 1024  # KiB
+ARGON2_LANES = 4
+MAX_ARGON2_ITERATIONS = 100
+SCRYPT_R = 8
+SCRYPT_P = 1
+MAX_SCRYPT_N = 2 ** 20  # 约1GB内存
+
+
+class KdfParams(NamedTuple):
+    """密钥派生参数，不使用的字段为0"""
+    algorithm: str  # argon2id / scrypt / pbkdf2
+    iterations: int = 0  # argon2id、pbkdf2
+    memory_cost: int = 0  # argon2id，单位KiB
+    lanes: int = 0  # argon2id
+    n: int = 0  # scrypt
+    r: int = 0  # scrypt
+    p: int = 0  # scrypt
+
+    def to_config(self) -> dict:
+        """转换为保存到config.json的字典（省略不使用的字段）"""
+        return {name: value for name, value in self._asdict().items() if value}
+
+    @classmethod
+    def from_config(cls, config: Optional[dict]) -> "KdfParams":
+        """从config.json的"kdf"读取参数，没有时返回旧版本使用的参数"""
+        if not config:
+            return LEGACY_PARAMS
+        if config.get("algorithm") not in _KDF_FACTORIES:
+            raise ValueError(f"不支持的密钥派生算法: {config.get('algorithm')}")
+        return cls(**{name: config[name] for name in cls._fields if name in config})
+
+
+# 旧版本固定使用的参数（PBKDF2-SHA256，10万次迭代）
+LEGACY_PARAMS = KdfParams("pbkdf2", iterations=100000)
+
+_KDF_FACTORIES = {
+    "argon2id": lambda salt, params: Argon2id(salt=salt, length=KEY_LENGTH, iterations=params.iterations,
+                                              lanes=params.lanes, memory_cost=params.memory_cost),
+    "scrypt": lambda salt, params: Scrypt(salt=salt, length=KEY_LENGTH, n=params.n, r=params.r, p=params.p),
+    "pbkdf2": lambda salt, params: PBKDF2HMAC(algorithm=hashes.SHA256(), length=KEY_LENGTH, salt=salt,
+                                              iterations=params.iterations),
+}
+
+
+def derive_key(password: str, salt: bytes, params: KdfParams) -> bytes:
+    """按参数从主密码派生32字节密钥（耗时操作，请在后台线程调用）"""
+    return _KDF_FACTORIES[params.algorithm](salt, params).derive(password.encode())
+
+
+def _measure(params: KdfParams, runs: int = 1) -> float:
+    """派生耗时（秒），多次测量时取中位数以减少干扰"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        derive_key("calibrate", b"\0" * 16, params)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def calibrate(target_seconds: float = TARGET_SECONDS, algorithm: str = DEFAULT_ALGORITHM) -> KdfParams:
+    """测量本机速度，选择派生耗时接近target_seconds的参数（不低于各算法的最低强度）
+
+    单次派生太快时计时误差占比很大，因此先加大强度到单次耗时不少于MIN_SAMPLE_SECONDS，
+    每个强度测量CALIBRATION_RUNS次取中位数；选出参数后再实测一次，超出目标时按比例降低
+    """
+    if algorithm == "argon2id":
+        # 耗时 ≈ 固定开销（分配内存） + 每轮耗时 × 轮数，用两个足够长的样本估计
+        def argon2(iterations: int) -> KdfParams:
+            return KdfParams("argon2id", iterations, ARGON2_MEMORY_COST, ARGON2_LANES)
+        sample = 1
+        elapsed = _measure(argon2(sample), CALIBRATION_RUNS)
+        while elapsed < MIN_SAMPLE_SECONDS and sample < MAX_ARGON2_ITERATIONS:
+            sample *= 2
+            elapsed = _measure(argon2(sample), CALIBRATION_RUNS)
+        double = _measure(argon2(sample * 2), CALIBRATION_RUNS)
+        per_round = max((double - elapsed) / sample, 1e-4)
+        overhead = max(elapsed - per_round * sample, 0.0)
+        iterations = _clamp(int((target_seconds - overhead) / per_round), 2, MAX_ARGON2_ITERATIONS)
+        actual = _measure(argon2(iterations))
+        if actual > target_seconds * OVERSHOOT_TOLERANCE:
+            iterations = _clamp(int(iterations * target_seconds / actual), 2, MAX_ARGON2_ITERATIONS)
+        return argon2(iterations)
+    if algorithm == "scrypt":
+        # n必须是2的幂，耗时与n成正比
+        def scrypt(n: int) -> KdfParams:
+            return KdfParams("scrypt", n=n, r=SCRYPT_R, p=SCRYPT_P)
+        n = 2 ** 14
+        elapsed = _measure(scrypt(n), CALIBRATION_RUNS)
+        while n < MAX_SCRYPT_N and elapsed * 2 <= target_seconds:
+            n *= 2
+            elapsed *= 2
+        if n > 2 ** 14 and _measure(scrypt(n)) > target_seconds * OVERSHOOT_TOLERANCE:
+            n //= 2
+        return scrypt(n)
+    if algorithm == "pbkdf2":
+        sample = 50000
+        elapsed = _measure(KdfParams("pbkdf2", iterations=sample), CALIBRATION_RUNS)
+        while elapsed < MIN_SAMPLE_SECONDS:
+            sample *= 2
+            elapsed = _measure(KdfParams("pbkdf2", iterations=sample), CALIBRATION_RUNS)
+        iterations = int(sample * target_seconds / max(elapsed, 1e-4))
+        actual = _measure(KdfParams("pbkdf2", iterations=iterations))
+        if actual > target_seconds * OVERSHOOT_TOLERANCE:
+            iterations = int(iterations * target_seconds / actual)
+        return KdfParams("pbkdf2", iterations=max(iterations, LEGACY_PARAMS.iterations))
+    raise ValueError(f"不支持的密钥派生算法: {algorithm}")
+
+
+def _clamp(value: int, low: int, high: int) -> int:
+    return min(max(value, low), high)
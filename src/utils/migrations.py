@@ -0,0 +1,144 @@
+"""
+数据库迁移模块 - 按版本号升级已有的密码库数据库
+
+Base.metadata.create_all只会创建不存在的表，不会修改已有的表和索引。
+已有数据库的结构变更写成迁移函数登记到MIGRATIONS中，
+当前版本号保存在SQLite的PRAGMA user_version里，每个迁移在各自的事务中执行。
+"""
+from typing import Callable, List, Tuple
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError
+from src.utils.pinyin import pinyin_keys
+
+
+def _create_password_indexes(connection: Connection):
+    """为passwords表的常用查询列创建索引"""
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_passwords_category_id ON passwords (category_id)")
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_passwords_category_title ON passwords (category_id, title)")
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_passwords_host ON passwords (host)")
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_passwords_updated_at ON passwords (updated_at)")
+
+
+def _create_password_fts(connection: Connection):
+    """创建passwords表的FTS5全文索引（trigram分词，支持子串和中文搜索），用触发器保持同步
+
+    SQLite不支持FTS5或trigram分词（3.34以下）时跳过，搜索退回LIKE匹配
+    """
+    try:
+        connection.exec_driver_sql("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS passwords_fts USING fts5(
+                title, username, notes, host, additional_params,
+                content='passwords', content_rowid='id', tokenize='trigram'
+            )
+        """)
+    except OperationalError as e:
+        print(f"SQLite不支持FTS5 trigram全文索引，搜索将使用LIKE匹配: {str(e)}")
+        return
+    
+    connection.exec_driver_sql("""
+        CREATE TRIGGER IF NOT EXISTS passwords_fts_insert AFTER INSERT ON passwords BEGIN
+            INSERT INTO passwords_fts(rowid, title, username, notes, host, additional_params)
+            VALUES (new.id, new.title, new.username, new.notes, new.host, new.additional_params);
+        END
+    """)
+    connection.exec_driver_sql("""
+        CREATE TRIGGER IF NOT EXISTS passwords_fts_delete AFTER DELETE ON passwords BEGIN
+            INSERT INTO passwords_fts(passwords_fts, rowid, title, username, notes, host, additional_params)
+            VALUES ('delete', old.id, old.title, old.username, old.notes, old.host, old.additional_params);
+        END
+    """)
+    # 只有被索引的列变化时才更新全文索引，修改密码本身不触发
+    connection.exec_driver_sql("""
+        CREATE TRIGGER IF NOT EXISTS passwords_fts_update
+        AFTER UPDATE OF title, username, notes, host, additional_params ON passwords BEGIN
+            INSERT INTO passwords_fts(passwords_fts, rowid, title, username, notes, host, additional_params)
+            VALUES ('delete', old.id, old.title, old.username, old.notes, old.host, old.additional_params);
+            INSERT INTO passwords_fts(rowid, title, username, notes, host, additional_params)
+            VALUES (new.id, new.title, new.username, new.notes, new.host, new.additional_params);
+        END
+    """)
+    # 为已有记录建立索引
+    connection.exec_driver_sql("INSERT INTO passwords_fts(passwords_fts) VALUES ('rebuild')")
+
+
+def _create_connection_indexes(connection: Connection):
+    """为搜索语法的字段过滤（type:、port:）创建索引"""
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_passwords_connection_type ON passwords (connection_type)")
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_passwords_port ON passwords (port)")
+
+
+def _add_column(connection: Connection, table: str, column: str, column_type: str):
+    """添加列（新建的数据库由create_all创建了最新结构，列已存在时跳过）"""
+    columns = {row[1] for row in connection.exec_driver_sql(f"PRAGMA table_info({table})")}
+    if column not in columns:
+        connection.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+
+def _add_pinyin_keys(connection: Connection):
+    """添加标题和类别名称的拼音搜索键列，并为已有记录计算"""
+    _add_column(connection, "passwords", "title_pinyin", "VARCHAR(300)")
+    _add_column(connection, "passwords", "title_initials", "VARCHAR(100)")
+    _add_column(connection, "categories", "name_pinyin", "VARCHAR(300)")
+    _add_column(connection, "categories", "name_initials", "VARCHAR(50)")
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_passwords_title_pinyin ON passwords (title_pinyin)")
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_passwords_title_initials ON passwords (title_initials)")
+    
+    rows = connection.exec_driver_sql("SELECT id, title FROM passwords").fetchall()
+    if rows:
+        connection.exec_driver_sql(
+            "UPDATE passwords SET title_pinyin = ?, title_initials = ? WHERE id = ?",
+            [pinyin_keys(title) + (password_id,) for password_id, title in rows])
+    rows = connection.exec_driver_sql("SELECT id, name FROM categories").fetchall()
+    if rows:
+        connection.exec_driver_sql(
+            "UPDATE categories SET name_pinyin = ?, name_initials = ? WHERE id = ?",
+            [pinyin_keys(name) + (category_id,) for category_id, name in rows])
+
+
+def has_password_fts(engine: Engine) -> bool:
+    """数据库中是否存在全文索引表"""
+    with engine.connect() as connection:
+        return connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='passwords_fts'"
+        ).scalar() is not None
+
+
+# (版本号, 说明, 迁移函数)，版本号必须递增，已发布的迁移不要修改
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "为passwords表添加索引", _create_password_indexes),
+    (2, "添加FTS5全文索引", _create_password_fts),
+    (3, "为连接类型和端口添加索引", _create_connection_indexes),
+    (4, "添加标题和类别名称的拼音搜索键", _add_pinyin_keys),
+]
+
+
+def get_schema_version(engine: Engine) -> int:
+    """获取数据库当前的结构版本"""
+    with engine.connect() as connection:
+        return connection.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def run_migrations(engine: Engine) -> int:
+    """执行所有未执行的迁移
+
+    Returns:
+        int: 迁移后的结构版本
+    """
+    version = get_schema_version(engine)
+    for migration_version, description, migrate in MIGRATIONS:
+        if migration_version <= version:
+            continue
+        with engine.begin() as connection:
+            migrate(connection)
+            connection.exec_driver_sql(f"PRAGMA user_version={migration_version}")
+        print(f"数据库已迁移到版本 {migration_version}: {description}")
+        version = migration_version
+    return version
@@ -0,0 +1,35 @@
+"""
+拼音模块 - 计算中文标题的全拼和首字母搜索键（例如"数据库" -> "shujuku"、"sjk"）
+
+搜索键在写入时计算并保存到数据库，搜索时只做前缀比较，不再逐次转换
+"""
+from typing import Optional, Tuple
+from pypinyin import lazy_pinyin
+
+_NOT_CHINESE = "\0"  # 标记lazy_pinyin原样返回的非中文片段
+
+
+def pinyin_keys(text: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """计算文本的(全拼, 首字母)，只保留小写字母和数字
+
+    非中文片段原样保留，例如"生产DB服务器" -> ("shengchandbfuwuqi", "scdbfwq")
+    """
+    if not text:
+        return None, None
+    full = []
+    initials = []
+    for item in lazy_pinyin(text, errors=lambda chars: [_NOT_CHINESE + chars]):
+        if item.startswith(_NOT_CHINESE):
+            item = "".join(char for char in item[1:].lower() if char.isalnum())
+            full.append(item)
+            initials.append(item)
+        else:
+            full.append(item)
+            initials.append(item[:1])
+    return "".join(full), "".join(initials)
+
+
+def is_pinyin_term(term: str) -> bool:
+    """关键字是否可能是拼音（只包含ASCII字母）"""
+    return term.isascii() and term.isalpha()
+
@@ -0,0 +1,129 @@
+"""
+搜索语法解析模块 - 把带字段限定的搜索内容解析为过滤条件和全文关键字
+
+示例: type:SSH host:10.20.* port:22 cat:生产 "web server"
+"""
+import re
+from typing import List, NamedTuple
+from sqlalchemy import false, or_, select
+from sqlalchemy.sql.elements import ColumnElement
+from src.models.password import Password
+from src.models.category import Category
+from src.utils.connection_templates import ConnectionTemplates
+
+# 支持的字段及别名
+FIELD_ALIASES = {
+    "type": "type",
+    "类型": "type",
+    "host": "host",
+    "主机": "host",
+    "port": "port",
+    "端口": "port",
+    "cat": "category",
+    "category": "category",
+    "分类": "category",
+}
+
+# 表示"普通密码"（没有连接类型）的取值
+PLAIN_TYPE_VALUES = {"普通", "普通密码", "none", "plain", "-"}
+
+# field:"带空格的值" | field:值 | "短语" | 普通关键字
+_TOKEN_PATTERN = re.compile(r'(\S+?):"([^"]*)"|(\S+?):(\S+)|"([^"]*)"|(\S+)')
+
+
+class QueryFilter(NamedTuple):
+    """字段过滤条件"""
+    field: str  # type / host / port / category
+    value: str
+
+
+class ParsedQuery(NamedTuple):
+    """解析后的搜索内容"""
+    filters: List[QueryFilter]
+    terms: List[str]  # 全文搜索关键字
+
+
+def parse_query(query: str) -> ParsedQuery:
+    """解析搜索内容
+
+    未知字段（例如"http://..."中的"http"）按普通关键字处理，引号内的短语作为一个关键字
+    """
+    filters = []
+    terms = []
+    for match in _TOKEN_PATTERN.finditer(query):
+        quoted_field, quoted_value, field, value, phrase, word = match.groups()
+        if quoted_field is not None or field is not None:
+            name = FIELD_ALIASES.get((quoted_field or field).lower())
+            filter_value = quoted_value if quoted_field is not None else value
+            if name and filter_value:
+                filters.append(QueryFilter(name, filter_value))
+            else:
+                terms.append(match.group(0).replace('"', ""))
+        elif phrase is not None:
+            if phrase.strip():
+                terms.append(phrase)
+        else:
+            terms.append(word)
+    return ParsedQuery(filters, terms)
+
+
+def _is_pattern(value: str) -> bool:
+    """值中是否包含GLOB通配符"""
+    return "*" in value or "?" in value
+
+
+def _type_predicate(value: str) -> ColumnElement:
+    """连接类型：不区分大小写地对应到已知类型，再做等值比较（可使用索引）"""
+    if value.lower() in PLAIN_TYPE_VALUES:
+        return or_(Password.connection_type.is_(None), Password.connection_type == "")
+    known_types = {template["connection_type"].lower(): template["connection_type"]
+                   for template in ConnectionTemplates.get_templates()}
+    return Password.connection_type == known_types.get(value.lower(), value)
+
+
+def _host_predicate(value: str) -> ColumnElement:
+    """主机：带通配符时用GLOB（以固定前缀开头时可使用索引），否则等值比较"""
+    if _is_pattern(value):
+        return Password.host.op("GLOB")(value)
+    return Password.host == value
+
+
+def _port_predicate(value: str) -> ColumnElement:
+    """端口：单个端口或"起-止"范围，格式错误时不匹配任何记录"""
+    low, _, high = value.partition("-")
+    try:
+        if not high:
+            return Password.port == int(low)
+        return Password.port.between(int(low), int(high))
+    except ValueError:
+        return false()
+
+
+def _category_predicate(value: str) -> ColumnElement:
+    """类别：类别ID，或类别名称/名称拼音/名称首字母（可带通配符），通过子查询换成category_id"""
+    if value.isdigit():
+        return Password.category_id == int(value)
+    pinyin = value.lower()  # 拼音搜索键都是小写
+    if _is_pattern(value):
+        condition = or_(Category.name.op("GLOB")(value), Category.name_pinyin.op("GLOB")(pinyin),
+                        Category.name_initials.op("GLOB")(pinyin))
+    else:
+        condition = or_(Category.name == value, Category.name_pinyin == pinyin,
+                        Category.name_initials == pinyin)
+    return Password.category_id.in_(select(Category.id).where(condition))
+
+
+_PREDICATES = {
+    "type": _type_predicate,
+    "host": _host_predicate,
+    "port": _port_predicate,
+    "category": _category_predicate,
+}
+
+
+def compile_filters(filters: List[QueryFilter]) -> List[ColumnElement]:
+    """把字段过滤条件编译为SQLAlchemy条件（同一字段出现多次时为"或"，不同字段之间为"与"）"""
+    by_field = {}
+    for query_filter in filters:
+        by_field.setdefault(query_filter.field, []).append(_PREDICATES[query_filter.field](query_filter.value))
+    return [predicates[0] if len(predicates) == 1 else or_(*predicates) for predicates in by_field.values()]
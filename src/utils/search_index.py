@@ -0,0 +1,130 @@
+"""
+内存搜索索引模块 - 基于trigram倒排索引的子串搜索
+"""
+import sys
+import threading
+from array import array
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Set, Union
+from src.models.password import PasswordSummary
+from src.utils.fuzzy import FuzzyMatcher, normalize_key
+
+
+def trigrams(text: str) -> Set[str]:
+    """文本中所有长度为3的子串"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def index_text(row: PasswordSummary) -> str:
+    """建立倒排表的文本：搜索列和标题的拼音搜索键"""
+    return "\n".join((row.search_text,) + row.pinyin_keys)
+
+
+def fuzzy_key(row: PasswordSummary) -> str:
+    """模糊搜索的匹配键：标题、用户名、主机和标题的拼音搜索键"""
+    values = (row.title, row.username, row.host) + row.pinyin_keys
+    return normalize_key(" ".join(value for value in values if value))
+
+
+class TrigramIndex:
+    """密码的内存子串索引
+
+    每条记录的search_text（加上标题的拼音搜索键）被拆成trigram，每个trigram对应一个数组存储的有序ID列表（倒排表），
+    增删记录时二分查找位置。
+    搜索时对每个关键字取倒排表最短的trigram得到候选，再对候选做子串校验，
+    因此结果与数据库搜索（子串匹配、拼音前缀匹配）一致。短于3个字符的关键字直接在候选或全部记录中校验。
+    同时为每条记录维护模糊搜索的匹配键（见fuzzy_search）。
+    """
+
+    def __init__(self):
+        self._rows: Dict[int, PasswordSummary] = {}
+        self._postings: Dict[str, array] = {}
+        self._fuzzy = FuzzyMatcher()
+        self._lock = threading.RLock()
+
+    def add(self, row: PasswordSummary):
+        """添加或替换一条记录（row需要带search_text）"""
+        with self._lock:
+            if row.id in self._rows:
+                self.remove(row.id)
+            self._rows[row.id] = row
+            for trigram in trigrams(index_text(row)):
+                posting = self._postings.get(trigram)
+                if posting is None:
+                    posting = self._postings[trigram] = array("I")
+                # 新记录的ID通常最大，直接追加；修改的记录插入到有序位置
+                if not posting or posting[-1] < row.id:
+                    posting.append(row.id)
+                else:
+                    insort(posting, row.id)
+            self._fuzzy.set(row.id, fuzzy_key(row), row.updated_at)
+
+    def add_many(self, rows: Iterable[PasswordSummary]):
+        """批量添加记录"""
+        with self._lock:
+            for row in rows:
+                self.add(row)
+
+    def remove(self, password_id: int):
+        """删除一条记录"""
+        with self._lock:
+            row = self._rows.pop(password_id, None)
+            if row is None:
+                return
+            self._fuzzy.remove(password_id)
+            for trigram in trigrams(index_text(row)):
+                posting = self._postings.get(trigram)
+                if posting is None:
+                    continue
+                position = bisect_left(posting, password_id)
+                if position < len(posting) and posting[position] == password_id:
+                    del posting[position]
+                if not posting:
+                    del self._postings[trigram]
+
+    def search(self, query: Union[str, List[str]]) -> List[PasswordSummary]:
+        """搜索同时包含所有关键字（子串、不区分大小写）的记录，按ID排序
+
+        query为字符串时按空格拆分关键字，也可以直接传入关键字列表（例如解析出的带空格的短语）
+        """
+        if isinstance(query, str):
+            query = query.split()
+        terms = [term.lower() for term in query]
+        with self._lock:
+            candidates = None
+            for term in terms:
+                if len(term) < 3:
+                    continue
+                postings = [self._postings.get(trigram) for trigram in trigrams(term)]
+                if any(posting is None for posting in postings):
+                    return []
+                shortest = min(postings, key=len)
+                candidates = set(shortest) if candidates is None else candidates.intersection(shortest)
+                if not candidates:
+                    return []
+
+            rows = self._rows.values() if candidates is None else (self._rows[pid] for pid in candidates)
+            results = [row for row in rows if all(row.matches_term(term) for term in terms)]
+        results.sort(key=lambda row: row.id)
+        return results
+
+    def fuzzy_search(self, query: str, limit: int = 500) -> List[PasswordSummary]:
+        """模糊搜索：关键字的字符按顺序出现即匹配（"prodb"匹配"prod-db-01"），按匹配质量和新近度排序"""
+        with self._lock:
+            return [self._rows[password_id] for password_id in self._fuzzy.search(query, limit)]
+
+    def memory_usage(self) -> int:
+        """索引占用的内存（字节，估算）"""
+        with self._lock:
+            size = sys.getsizeof(self._rows) + sys.getsizeof(self._postings)
+            for trigram, posting in self._postings.items():
+                size += sys.getsizeof(trigram) + sys.getsizeof(posting)
+            for row in self._rows.values():
+                size += sys.getsizeof(row) + sys.getsizeof(row.search_text)
+                size += sum(sys.getsizeof(key) for key in row.pinyin_keys)
+                size += sum(sys.getsizeof(value) for value in (row.title, row.username, row.host)
+                            if value is not None)
+            return size
+
+    def __len__(self):
+        return len(self._rows)
@@ -0,0 +1,66 @@
+"""
+解密缓存模块 - 在内存中短时间缓存已解密的密码
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+
+
+class SecretCache:
+    """已解密密码的缓存，按密码ID索引
+
+    - 容量有限，超出时淘汰最久未使用的条目（LRU）
+    - 每个条目在ttl秒后过期
+    - 记录写入时的updated_at，密码被修改后缓存自动失效
+    - 锁定时调用clear()丢弃所有明文
+    """
+
+    def __init__(self, max_size: int = 128, ttl: float = 300):
+        """
+        Args:
+            max_size: 最多缓存的密码条数
+            ttl: 缓存有效期（秒）
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # password_id -> (updated_at, secret, expires_at)
+        self._lock = threading.Lock()
+
+    def get(self, password_id: int, updated_at: Optional[datetime]) -> Optional[str]:
+        """获取缓存的明文，未命中、已过期或记录已修改时返回None"""
+        with self._lock:
+            entry = self._entries.get(password_id)
+            if entry is None:
+                return None
+            cached_updated_at, secret, expires_at = entry
+            if cached_updated_at != updated_at or expires_at < time.monotonic():
+                del self._entries[password_id]
+                return None
+            self._entries.move_to_end(password_id)
+            return secret
+
+    def put(self, password_id: int, updated_at: Optional[datetime], secret: str):
+        """缓存明文"""
+        with self._lock:
+            self._entries[password_id] = (updated_at, secret, time.monotonic() + self.ttl)
+            self._entries.move_to_end(password_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, password_id: int):
+        """移除单个密码的缓存"""
+        with self._lock:
+            self._entries.pop(password_id, None)
+
+    def clear(self):
+        """清空缓存
+
+        Python字符串不可变，无法原地擦除内存，这里丢弃所有引用让明文尽快被回收
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,37 @@
+"""
+密码库配置模块 - 读写config.json（主密码校验数据、盐、密钥派生参数和密文格式）
+"""
+import json
+import os
+
+CONFIG_FILE = "config.json"
+RECORD_FORMAT_COMPACT = "aesgcm"  # config.json中"record_format"的取值，没有时使用Fernet
+
+
+def config_exists() -> bool:
+    """是否已创建密码库"""
+    return os.path.exists(CONFIG_FILE)
+
+
+def load_config() -> dict:
+    """读取配置"""
+    with open(CONFIG_FILE, "r") as f:
+        return json.load(f)
+
+
+def uses_compact_records(config: dict) -> bool:
+    """密码库是否使用紧凑密文格式"""
+    return config.get("record_format") == RECORD_FORMAT_COMPACT
+
+
+def save_config(config: dict):
+    """保存配置
+
+    先写入临时文件再替换，写入过程中断时原配置保持完整
+    """
+    temp_file = CONFIG_FILE + ".tmp"
+    with open(temp_file, "w") as f:
+        json.dump(config, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_file, CONFIG_FILE)
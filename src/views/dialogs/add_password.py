@@ -4,7 +4,6 @@ from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
                              QWidget, QFormLayout, QCheckBox)
 from PySide6.QtCore import Qt
 from src.controllers.password_manager import PasswordManager
-from src.models.category import Category
 from src.views.dialogs.generator import PasswordGeneratorDialog
 from src.utils.connection_templates import ConnectionTemplates
 
@@ -203,18 +202,14 @@ class AddPasswordDialog(QDialog):
         """加载类别列表"""
         self.category_combo.clear()
         
-        session = self.password_manager.Session()
-        try:
-            categories = session.query(Category).all()
-            if not categories:
-                QMessageBox.warning(self, "警告", "没有可用的密码类别，请先创建类别")
-                self.reject()
-                return
-                
-            for category in categories:
-                self.category_combo.addItem(category.name, category.id)
-        finally:
-            session.close()
+        categories = self.password_manager.get_categories()
+        if not categories:
+            QMessageBox.warning(self, "警告", "没有可用的密码类别，请先创建类别")
+            self.reject()
+            return
+            
+        for category in categories:
+            self.category_combo.addItem(category.name, category.id)
         
     def generate_password(self):
         """打开密码生成器对话框"""
@@ -3,8 +3,6 @@ from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
                              QListWidgetItem)
 from PySide6.QtCore import Qt
 from src.controllers.password_manager import PasswordManager
-from src.models.category import Category
-from sqlalchemy.orm import Session
 
 class CategoryDialog(QDialog):
     def __init__(self, parent=None, password_manager=None):
@@ -48,15 +46,10 @@ class CategoryDialog(QDialog):
         """加载类别列表"""
         self.category_list.clear()
         
-        session = self.password_manager.Session()
-        try:
-            categories = session.query(Category).all()
-            for category in categories:
-                item = QListWidgetItem(category.name)
-                item.setData(Qt.UserRole, category.id)
-                self.category_list.addItem(item)
-        finally:
-            session.close()
+        for category in self.password_manager.get_categories():
+            item = QListWidgetItem(category.name)
+            item.setData(Qt.UserRole, category.id)
+            self.category_list.addItem(item)
             
     def add_category(self):
         """添加新类别"""
@@ -65,18 +58,12 @@ class CategoryDialog(QDialog):
             QMessageBox.warning(self, "错误", "请输入类别名称")
             return
             
-        session = self.password_manager.Session()
         try:
-            # 检查是否已存在同名类别
-            existing = session.query(Category).filter_by(name=name).first()
-            if existing:
+            # 添加新类别，已存在同名类别时返回None
+            category = self.password_manager.add_category(name)
+            if not category:
                 QMessageBox.warning(self, "错误", "已存在同名类别")
                 return
-                
-            # 添加新类别
-            category = Category(name=name)
-            session.add(category)
-            session.commit()
             
             # 更新列表
             item = QListWidgetItem(category.name)
@@ -88,8 +75,6 @@ class CategoryDialog(QDialog):
             
         except Exception as e:
             QMessageBox.critical(self, "错误", f"添加类别失败: {str(e)}")
-        finally:
-            session.close()
             
     def delete_category(self):
         """删除所选类别"""
@@ -111,22 +96,14 @@ class CategoryDialog(QDialog):
         if reply == QMessageBox.No:
             return
             
-        session = self.password_manager.Session()
         try:
-            # 查找类别
-            category = session.query(Category).filter_by(id=category_id).first()
-            if not category:
+            # 删除类别
+            if not self.password_manager.delete_category(category_id):
                 QMessageBox.warning(self, "错误", "类别不存在")
                 return
-                
-            # 删除类别
-            session.delete(category)
-            session.commit()
             
             # 更新列表
             self.category_list.takeItem(self.category_list.row(current_item))
             
         except Exception as e:
-            QMessageBox.critical(self, "错误", f"删除类别失败: {str(e)}")
-        finally:
-            session.close() 
\ No newline at end of file
+            QMessageBox.critical(self, "错误", f"删除类别失败: {str(e)}")
\ No newline at end of file
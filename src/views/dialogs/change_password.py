@@ -0,0 +1,121 @@
+from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QLineEdit,
+                             QPushButton, QMessageBox, QProgressBar)
+from src.controllers.password_manager import PasswordManager
+from src.controllers.vault_worker import AsyncVault
+from src.utils import envelope
+from src.utils.kdf import KdfParams
+from src.utils.vault_config import load_config, save_config
+
+
+class ChangeMasterPasswordDialog(QDialog):
+    """修改主密码
+
+    密码记录由数据密钥加密，修改主密码只重新加密config.json中的数据密钥，不需要重新加密记录
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.password_manager = PasswordManager.shared()
+        # 验证旧密码和派生新密钥各需约0.5秒，在后台线程执行
+        self.vault = AsyncVault(self.password_manager, self)
+        self.setup_ui()
+
+    def setup_ui(self):
+        """设置用户界面"""
+        self.setWindowTitle("修改主密码")
+        self.setMinimumWidth(360)
+
+        layout = QVBoxLayout(self)
+
+        form_layout = QFormLayout()
+        self.current_input = QLineEdit()
+        self.current_input.setEchoMode(QLineEdit.Password)
+        form_layout.addRow("当前主密码:", self.current_input)
+        self.new_input = QLineEdit()
+        self.new_input.setEchoMode(QLineEdit.Password)
+        form_layout.addRow("新主密码:", self.new_input)
+        self.confirm_input = QLineEdit()
+        self.confirm_input.setEchoMode(QLineEdit.Password)
+        form_layout.addRow("确认新主密码:", self.confirm_input)
+        layout.addLayout(form_layout)
+
+        # 派生密钥期间显示忙碌状态
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setFixedHeight(6)
+        self.progress_bar.setTextVisible(False)
+        self.progress_bar.hide()
+        layout.addWidget(self.progress_bar)
+
+        # 按钮
+        button_layout = QHBoxLayout()
+        self.ok_button = QPushButton("确定")
+        self.cancel_button = QPushButton("取消")
+        self.ok_button.clicked.connect(self.change_password)
+        self.cancel_button.clicked.connect(self.reject)
+        button_layout.addWidget(self.ok_button)
+        button_layout.addWidget(self.cancel_button)
+        layout.addLayout(button_layout)
+
+    def set_busy(self, busy: bool):
+        """派生密钥期间禁用输入"""
+        for widget in (self.current_input, self.new_input, self.confirm_input, self.ok_button, self.cancel_button):
+            widget.setEnabled(not busy)
+        self.progress_bar.setVisible(busy)
+
+    def change_password(self):
+        """验证当前主密码并保存新主密码加密的数据密钥"""
+        current = self.current_input.text()
+        new = self.new_input.text()
+        if not current or not new:
+            QMessageBox.warning(self, "错误", "请输入当前主密码和新主密码")
+            return
+        if new != self.confirm_input.text():
+            QMessageBox.warning(self, "错误", "两次输入的新主密码不一致")
+            return
+
+        try:
+            config = load_config()
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"读取密码库配置失败: {str(e)}")
+            return
+
+        self.set_busy(True)
+        self.vault.submit(
+            "kdf", self._rewrap_data_key, config, current, new,
+            on_result=self.on_password_changed, on_error=self.on_change_failed
+        )
+
+    def _rewrap_data_key(self, config: dict, current: str, new: str) -> bool:
+        """在后台线程用新主密码重新加密数据密钥，当前主密码不正确时返回False"""
+        keys = envelope.unlock_keys(config, current)
+        if keys is None:
+            return False
+        if keys[0] != self.password_manager.encryption_manager.key:
+            raise RuntimeError("配置文件与当前打开的密码库不一致")
+        params = KdfParams.from_config(config.get("kdf"))
+        # 密钥轮换未完成时旧数据密钥也改用新主密码加密
+        save_config(envelope.seal_config(config, keys[0], new, params, previous_keys=keys[1:]))
+        return True
+
+    def on_password_changed(self, changed: bool):
+        """修改完成"""
+        if not changed:
+            self.set_busy(False)
+            QMessageBox.warning(self, "错误", "当前主密码不正确")
+            self.current_input.clear()
+            self.current_input.setFocus()
+            return
+        QMessageBox.information(self, "成功", "主密码已修改")
+        self.accept()
+
+    def on_change_failed(self, message: str):
+        """修改出错，原主密码仍然有效"""
+        self.set_busy(False)
+        QMessageBox.critical(self, "错误", f"修改主密码失败: {message}")
+
+    def done(self, result: int):
+        # 关闭前等待后台的密钥派生结束
+        self.vault.cancel("kdf")
+        self.vault.close()
+        super().done(result)
@@ -0,0 +1,113 @@
+from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QLabel, QLineEdit,
+                             QPushButton, QMessageBox, QProgressBar)
+from PySide6.QtCore import Signal
+from typing import Optional
+from src.controllers.key_rotation import KeyRotation
+from src.controllers.password_manager import PasswordManager
+from src.controllers.vault_worker import AsyncVault
+
+
+class KeyRotationDialog(QDialog):
+    """轮换数据密钥
+
+    生成新的数据密钥并在后台分批重新加密所有密码，期间可以正常使用密码库；
+    关闭对话框时在当前批次结束后暂停，主窗口会在后台继续
+    """
+    progressChanged = Signal(int, int)  # (已完成, 总数)，在工作线程发出
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.password_manager = PasswordManager.shared()
+        self.rotation = KeyRotation(self.password_manager)
+        self.vault = AsyncVault(self.password_manager, self)
+        self.paused = False
+        self.setup_ui()
+        self.progressChanged.connect(self.on_progress)
+
+    def setup_ui(self):
+        """设置用户界面"""
+        self.setWindowTitle("轮换数据密钥")
+        self.setMinimumWidth(360)
+
+        layout = QVBoxLayout(self)
+
+        hint_label = QLabel("生成新的数据密钥并重新加密所有密码，中断后会从中断处继续")
+        hint_label.setWordWrap(True)
+        layout.addWidget(hint_label)
+
+        form_layout = QFormLayout()
+        self.password_input = QLineEdit()
+        self.password_input.setEchoMode(QLineEdit.Password)
+        form_layout.addRow("主密码:", self.password_input)
+        layout.addLayout(form_layout)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.hide()
+        layout.addWidget(self.progress_bar)
+
+        # 按钮
+        button_layout = QHBoxLayout()
+        self.start_button = QPushButton("开始")
+        self.close_button = QPushButton("取消")
+        self.start_button.clicked.connect(self.start_rotation)
+        self.close_button.clicked.connect(self.reject)
+        button_layout.addWidget(self.start_button)
+        button_layout.addWidget(self.close_button)
+        layout.addLayout(button_layout)
+
+    def set_busy(self, busy: bool):
+        """轮换期间禁用输入，取消按钮变为暂停"""
+        self.password_input.setEnabled(not busy)
+        self.start_button.setEnabled(not busy)
+        self.close_button.setText("暂停" if busy else "取消")
+        if busy:
+            self.progress_bar.setRange(0, 0)  # 验证主密码期间显示不确定进度
+            self.progress_bar.show()
+        else:
+            self.progress_bar.hide()
+
+    def start_rotation(self):
+        """验证主密码并在后台开始轮换"""
+        password = self.password_input.text()
+        if not password:
+            QMessageBox.warning(self, "错误", "请输入主密码")
+            return
+        self.set_busy(True)
+        self.vault.submit(
+            "rotate", self._rotate, password,
+            on_result=self.on_rotation_finished, on_error=self.on_rotation_failed
+        )
+
+    def _rotate(self, password: str) -> Optional[bool]:
+        """在后台线程执行轮换，主密码不正确时返回None，暂停时返回False"""
+        if not self.rotation.start(password):
+            return None
+        return self.rotation.run(progress=self.progressChanged.emit, cancelled=lambda: self.paused)
+
+    def on_progress(self, done: int, total: int):
+        """更新进度条"""
+        self.progress_bar.setRange(0, max(total, 1))
+        self.progress_bar.setValue(done)
+
+    def on_rotation_finished(self, finished: Optional[bool]):
+        """轮换结束或暂停"""
+        if finished is None:
+            self.set_busy(False)
+            QMessageBox.warning(self, "错误", "主密码不正确")
+            self.password_input.clear()
+            self.password_input.setFocus()
+            return
+        if finished:
+            QMessageBox.information(self, "成功", "数据密钥已轮换，所有密码已用新密钥重新加密")
+            self.accept()
+
+    def on_rotation_failed(self, message: str):
+        """轮换出错，已提交的批次保留，再次开始时从检查点继续"""
+        self.set_busy(False)
+        QMessageBox.critical(self, "错误", f"轮换数据密钥失败: {message}")
+
+    def done(self, result: int):
+        # 关闭前在当前批次结束后暂停（不取消任务，以便后台线程保存检查点）
+        self.paused = True
+        self.vault.close()
+        super().done(result)
@@ -1,12 +1,15 @@
 from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
-                             QLineEdit, QPushButton, QMessageBox, QFrame, QWidget)
+                             QLineEdit, QPushButton, QMessageBox, QFrame, QWidget, QProgressBar)
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QFont, QPixmap
-import os
+from typing import List, Optional
 from src.controllers.password_manager import PasswordManager
-from src.utils.encryption import EncryptionManager
+from src.controllers.vault_worker import AsyncVault
+from src.utils import envelope
+from src.utils.kdf import KdfParams, calibrate
+from src.utils.vault_config import (RECORD_FORMAT_COMPACT, config_exists, load_config, save_config,
+                                    uses_compact_records)
 from src.views.custom_titlebar import CustomTitleBar
-import json
 import warnings
 
 
@@ -14,8 +17,9 @@ import warnings
 class LoginDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent, Qt.FramelessWindowHint)  # 无边框窗口
-        self.password_manager = PasswordManager()
-        self.encryption_manager = EncryptionManager()
+        self.password_manager = PasswordManager.shared()
+        # 密钥派生耗时约0.5秒，在后台线程执行，避免对话框卡住
+        self.vault = AsyncVault(self.password_manager, self)
         self.setup_ui()
         
     def setup_ui(self):
@@ -23,7 +27,7 @@ class LoginDialog(QDialog):
         self.setWindowTitle("LovelyPassword - 登录")
         self.setMinimumWidth(380)
         self.setMinimumHeight(250)  # 进一步减小窗口高度
-        self.setFixedSize(380, 200)  # 固定窗口大小，增加高度以适应标题栏
+        self.setFixedSize(380, 210)  # 固定窗口大小，增加高度以适应标题栏和进度条
         
         # 创建自定义标题栏
         self.title_bar = CustomTitleBar(self, "LovelyPassword - 登录")
@@ -76,6 +80,7 @@ class LoginDialog(QDialog):
         login_buttons_layout.setSpacing(10)  
         
         create_button = QPushButton("创建新密码库")
+        self.create_button = create_button
         create_button.setFixedHeight(28)  
         create_button.setStyleSheet("""
             QPushButton {
@@ -95,6 +100,7 @@ class LoginDialog(QDialog):
         login_buttons_layout.addWidget(create_button)
         
         login_button = QPushButton("登录")
+        self.login_button = login_button
         login_button.setFixedHeight(28)  
         login_button.setStyleSheet("""
             QPushButton {
@@ -117,8 +123,16 @@ class LoginDialog(QDialog):
         
         layout.addLayout(login_buttons_layout)
         
+        # 密钥派生进度（派生期间显示为忙碌状态）
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setFixedHeight(6)
+        self.progress_bar.setTextVisible(False)
+        self.progress_bar.hide()
+        layout.addWidget(self.progress_bar)
+        
         # 添加额外提示信息
         hint_label = QLabel("首次使用请创建新密码库")
+        self.hint_label = hint_label
         hint_label.setAlignment(Qt.AlignCenter)
         hint_label.setStyleSheet("color: #999; font-size: 9px; margin-top: 5px;")  
         layout.addWidget(hint_label)
@@ -126,45 +140,88 @@ class LoginDialog(QDialog):
         # 设置回车键触发登录
         self.password_input.returnPressed.connect(self.verify_password)
         
+    def set_busy(self, busy: bool, message: str = ""):
+        """派生密钥期间禁用输入并显示忙碌进度条"""
+        self.password_input.setEnabled(not busy)
+        self.login_button.setEnabled(not busy)
+        self.create_button.setEnabled(not busy)
+        self.progress_bar.setRange(0, 0)  # 不确定进度
+        self.progress_bar.setVisible(busy)
+        self.hint_label.setText(message if busy else "首次使用请创建新密码库")
+        
     def verify_password(self):
-        """验证主密码"""
+        """验证主密码（在后台线程派生密钥）"""
         password = self.password_input.text()
         if not password:
             QMessageBox.warning(self, "错误", "请输入主密码")
             return
         
         # 检查配置文件是否存在
-        if not os.path.exists("config.json"):
+        if not config_exists():
             QMessageBox.warning(self, "错误", "密码库不存在")
             return
         
         # 读取配置文件
         try:
-            with open("config.json", "r") as f:
-                config = json.load(f)
-            
-            # 验证密码
-            stored_key = config.get("key")
-            salt = bytes.fromhex(config.get("salt"))
-            
-            key, _ = self.encryption_manager.generate_key_from_password(password, salt)
-            
-            if key.decode() == stored_key:
-                # 初始化密码管理器
-                self.password_manager.encryption_manager.initialize(key)
-                self.accept()
-            else:
-                QMessageBox.warning(self, "错误", "主密码不正确")
-                self.password_input.clear()
-                self.password_input.setFocus()
-                
+            config = load_config()
+            # 没有"kdf"的旧密码库使用固定的PBKDF2参数
+            KdfParams.from_config(config.get("kdf"))
         except Exception as e:
             QMessageBox.critical(self, "错误", f"验证密码失败: {str(e)}")
+            return
+        
+        self.set_busy(True, "正在验证主密码...")
+        self.vault.submit(
+            "kdf", envelope.unlock_keys, config, password,
+            on_result=lambda keys: self.on_unlocked(password, config, keys),
+            on_error=self.on_verify_failed
+        )
+        
+    def on_unlocked(self, password: str, config: dict, keys: Optional[List[bytes]]):
+        """密钥派生完成，keys为[当前数据密钥, 密钥轮换未完成时的旧数据密钥...]，主密码不正确时为None"""
+        if keys is None:
+            self.set_busy(False)
+            QMessageBox.warning(self, "错误", "主密码不正确")
+            self.password_input.clear()
+            self.password_input.setFocus()
+            return
+        
+        # 初始化密码管理器
+        data_key = keys[0]
+        self.password_manager.encryption_manager.initialize(data_key)
+        self.password_manager.encryption_manager.set_previous_keys(keys[1:])
+        self.password_manager.encryption_manager.compact_records = uses_compact_records(config)
+        if envelope.is_wrapped(config) and "kdf" in config:
+            self.accept()
+            return
+        
+        # 旧密码库：原来的派生密钥作为数据密钥，用按本机速度选择的新参数加密后保存，
+        # 已有的密码不需要重新加密
+        self.set_busy(True, "正在升级密码库的加密参数...")
+        self.vault.submit(
+            "kdf", self._upgrade_vault, password, config, data_key,
+            on_result=lambda _: self.accept(), on_error=self.on_upgrade_failed
+        )
+        
+    def _upgrade_vault(self, password: str, config: dict, data_key: bytes):
+        """在后台线程校准派生参数，并用主密码加密数据密钥"""
+        params = KdfParams.from_config(config["kdf"]) if "kdf" in config else calibrate()
+        save_config(envelope.seal_config(config, data_key, password, params))
+        
+    def on_upgrade_failed(self, message: str):
+        """升级失败时仍使用原参数和原密钥登录"""
+        QMessageBox.warning(self, "提示", f"升级密码库加密参数失败，将继续使用原参数: {message}")
+        self.accept()
+        
+    def on_verify_failed(self, message: str):
+        """派生密钥出错"""
+        self.set_busy(False)
+        QMessageBox.critical(self, "错误", f"验证密码失败: {message}")
     
     def create_new_vault(self):
         """创建新的密码库"""
         # 检查是否已经存在密码库
-        if os.path.exists("config.json"):
+        if config_exists():
             reply = QMessageBox.question(
                 self,
                 "确认",
@@ -179,24 +236,35 @@ class LoginDialog(QDialog):
             QMessageBox.warning(self, "错误", "请输入主密码")
             return
         
-        try:
-            # 生成密钥
-            key, salt = self.encryption_manager.generate_key_from_password(password)
-            
-            # 保存配置
-            config = {
-                "key": key.decode(),
-                "salt": salt.hex()
-            }
-            
-            with open("config.json", "w") as f:
-                json.dump(config, f)
-            
-            # 初始化密码管理器
-            self.password_manager.encryption_manager.initialize(key)
-            
-            QMessageBox.information(self, "成功", "密码库创建成功")
-            self.accept()
-            
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"创建密码库失败: {str(e)}") 
\ No newline at end of file
+        self.set_busy(True, "正在测量本机速度并生成密钥...")
+        self.vault.submit(
+            "kdf", self._create_vault_key, password,
+            on_result=self.on_vault_created, on_error=self.on_create_failed
+        )
+        
+    def _create_vault_key(self, password: str) -> bytes:
+        """在后台线程校准派生参数、生成数据密钥并保存配置，返回数据密钥"""
+        config, data_key = envelope.create(password, calibrate())
+        config["record_format"] = RECORD_FORMAT_COMPACT  # 新密码库使用紧凑密文格式
+        save_config(config)
+        return data_key
+        
+    def on_vault_created(self, data_key: bytes):
+        """密码库创建完成"""
+        # 初始化密码管理器
+        self.password_manager.encryption_manager.initialize(data_key)
+        self.password_manager.encryption_manager.compact_records = True
+        
+        QMessageBox.information(self, "成功", "密码库创建成功")
+        self.accept()
+        
+    def on_create_failed(self, message: str):
+        """创建密码库出错"""
+        self.set_busy(False)
+        QMessageBox.critical(self, "错误", f"创建密码库失败: {message}")
+        
+    def done(self, result: int):
+        # 关闭对话框前等待后台的密钥派生结束
+        self.vault.cancel("kdf")
+        self.vault.close()
+        super().done(result)
@@ -2,10 +2,15 @@ from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
                              QLineEdit, QSpinBox, QCheckBox, QPushButton,
                              QMessageBox)
 from PySide6.QtCore import Qt
+from src.views.dialogs.change_password import ChangeMasterPasswordDialog
+from src.views.dialogs.key_rotation import KeyRotationDialog
+from src.utils.vault_config import (RECORD_FORMAT_COMPACT, config_exists, load_config, save_config,
+                                    uses_compact_records)
 
 class SettingsDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.compact_records_changed = False  # 保存后密文格式是否改变（主窗口据此在后台转换）
         self.setup_ui()
         self.load_settings()
         
@@ -60,6 +65,21 @@ class SettingsDialog(QDialog):
         
         layout.addLayout(generator_layout)
         
+        # 存储设置
+        self.compact_records = QCheckBox("使用紧凑加密格式（AES-GCM，数据库更小）")
+        self.compact_records.setToolTip("保存后在后台转换已有的密码，转换期间可以正常使用")
+        layout.addWidget(self.compact_records)
+        
+        # 修改主密码（只重新加密数据密钥，立即生效）
+        change_password_button = QPushButton("修改主密码...")
+        change_password_button.clicked.connect(self.change_master_password)
+        layout.addWidget(change_password_button)
+        
+        # 轮换数据密钥（重新加密所有密码，可中断后继续）
+        rotate_key_button = QPushButton("轮换数据密钥...")
+        rotate_key_button.clicked.connect(self.rotate_data_key)
+        layout.addWidget(rotate_key_button)
+        
         # 按钮
         button_layout = QHBoxLayout()
         save_button = QPushButton("保存")
@@ -70,9 +90,19 @@ class SettingsDialog(QDialog):
         button_layout.addWidget(cancel_button)
         layout.addLayout(button_layout)
         
+    def change_master_password(self):
+        """打开修改主密码对话框"""
+        ChangeMasterPasswordDialog(self).exec()
+        
+    def rotate_data_key(self):
+        """打开轮换数据密钥对话框"""
+        KeyRotationDialog(self).exec()
+        
     def load_settings(self):
         """加载设置"""
         # TODO: 从配置文件加载设置
+        if config_exists():
+            self.compact_records.setChecked(uses_compact_records(load_config()))
         
     def save_settings(self):
         """保存设置"""
@@ -87,5 +117,15 @@ class SettingsDialog(QDialog):
         
         # TODO: 保存设置到配置文件
         
+        if config_exists():
+            config = load_config()
+            if uses_compact_records(config) != self.compact_records.isChecked():
+                if self.compact_records.isChecked():
+                    config["record_format"] = RECORD_FORMAT_COMPACT
+                else:
+                    config.pop("record_format", None)
+                save_config(config)
+                self.compact_records_changed = True
+        
         QMessageBox.information(self, "成功", "设置已保存")
         self.accept() 
\ No newline at end of file
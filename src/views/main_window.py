@@ -1,33 +1,64 @@
 from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-                             QTreeWidget, QTreeWidgetItem, QTableWidget,
-                             QTableWidgetItem, QPushButton, QLineEdit,
+                             QTreeWidget, QTreeWidgetItem, QPushButton, QLineEdit,
                              QLabel, QStatusBar, QMessageBox, QToolBar, 
-                             QSizePolicy, QHeaderView, QFrame, QMenu,
-                             QFileDialog)
-from PySide6.QtCore import Qt, QTimer, QSize, QPoint
-from PySide6.QtGui import QIcon, QFont, QPixmap, QAction, QColor, QPalette, QLinearGradient, QCursor
+                             QSizePolicy, QFrame, QMenu,
+                             QFileDialog, QCheckBox, QComboBox, QApplication)
+from PySide6.QtCore import Qt, QTimer, QSize, QPoint, Signal, QEvent
+from PySide6.QtGui import QIcon, QPixmap, QAction, QColor, QPalette, QLinearGradient, QCursor
 import pyperclip
 from src.controllers.password_manager import PasswordManager
+from src.controllers.vault_worker import AsyncVault, CancelToken
+from src.controllers.key_rotation import KeyRotation
+from src.controllers.search_controller import SearchController
 from src.views.dialogs.add_password import AddPasswordDialog
 from src.views.dialogs.settings import SettingsDialog
 from src.views.dialogs.category import CategoryDialog
-from src.models.category import Category
 from src.utils.connection import ConnectionManager
+from src.utils.connection_templates import ConnectionTemplates
 from src.utils.import_export import ImportExportManager
 from src.views.dialogs.password_detail import PasswordDetailDialog
+from src.views.password_table import PasswordTableView
 from src.views.custom_titlebar import CustomTitleBar
 import src.utils.resource_helper as resource_helper
 
+CATEGORY_NAME_ROLE = Qt.UserRole + 1  # 类别树节点中保存的类别名称（显示文字带有数量）
+
 class MainWindow(QMainWindow):
+    rotationProgress = Signal(int, int)  # 后台密钥轮换的进度(已完成, 总数)，在工作线程发出
+    
     def __init__(self):
         super().__init__(None, Qt.FramelessWindowHint)  # 无边框窗口
-        self.password_manager = PasswordManager()
+        self.password_manager = PasswordManager.shared()
+        self.password_manager.enable_secret_cache()
+        # 查询、批量解密、导入导出都在后台线程执行
+        self.vault = AsyncVault(self.password_manager, self)
+        # 边输入边搜索：防抖、丢弃过期搜索、在上次结果中继续筛选
+        self.search_controller = SearchController(self.password_manager, self.vault, debounce_ms=250, parent=self)
+        self.search_controller.resultsReady.connect(self.on_search_results)
+        self.search_controller.searchFailed.connect(self.on_vault_error)
+        # 新增、修改、删除后只更新表格中受影响的行
+        self.vault.changed.connect(self.on_vault_changed)
         self.password_list = []
         self.filtered_password_list = []
         self.is_filtered = False
+        self.current_category_id = -1
+        self.page_size = 500  # 每次从数据库加载的条数
+        self.first_page_size = 100  # 第一屏加载的条数
+        # 渐进加载：第一屏显示后在后台继续分批加载其余密码，否则滚动到底部时才加载下一页
+        self.progressive_loading = True
+        self.has_more_passwords = False  # 当前类别是否还有未加载的密码
+        self.total_passwords = None  # 当前类别的密码总数（渐进加载时显示进度）
+        self.convert_token = None  # 后台密文格式转换的停止标记
+        self.rotation_token = None  # 后台密钥轮换的暂停标记
+        self.rotationProgress.connect(self.on_key_rotation_progress)
         self.setup_ui()
         self.setup_connections()
         self.setup_auto_lock()
+        self.build_search_index()
+        # 继续上次未完成的密文格式转换（没有需要转换的记录时立即结束）
+        self.convert_record_format()
+        # 继续上次未完成的数据密钥轮换
+        self.resume_key_rotation()
         
     def setup_ui(self):
         """设置用户界面"""
@@ -65,8 +96,18 @@ class MainWindow(QMainWindow):
         self.search_label = QLabel("搜索:")
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("输入关键字搜索密码...")
+        self.fuzzy_search_checkbox = QCheckBox("模糊搜索")
+        self.fuzzy_search_checkbox.setToolTip("按顺序包含关键字的字符即可匹配，例如 prodb 可以找到 prod-db-01")
+        # 按连接类型筛选已加载的行（在内存中筛选，不查询数据库）
+        self.type_filter_combo = QComboBox()
+        self.type_filter_combo.addItem("全部类型", None)
+        self.type_filter_combo.addItem("普通密码", "")
+        for template in ConnectionTemplates.get_templates():
+            self.type_filter_combo.addItem(template["name"], template["connection_type"])
         self.search_layout.addWidget(self.search_label)
         self.search_layout.addWidget(self.search_input)
+        self.search_layout.addWidget(self.type_filter_combo)
+        self.search_layout.addWidget(self.fuzzy_search_checkbox)
         self.main_layout.addLayout(self.search_layout)
         
         # 内容区域
@@ -101,15 +142,8 @@ class MainWindow(QMainWindow):
         self.passwords_label.setStyleSheet("font-weight: bold; color: #666; margin: 5px 0;")
         self.right_layout.addWidget(self.passwords_label)
         
-        # 密码表格
-        self.password_table = QTableWidget()
-        self.password_table.setColumnCount(6)
-        self.password_table.setHorizontalHeaderLabels(["标题", "用户名", "密码", "密码类型", "连接信息", "操作"])
-        self.password_table.horizontalHeader().setStretchLastSection(True)
-        self.password_table.verticalHeader().setVisible(False)
-        self.password_table.setAlternatingRowColors(True)
-        self.password_table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.password_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        # 密码表格（模型/视图，只绘制可见行）
+        self.password_table = PasswordTableView()
         self.right_layout.addWidget(self.password_table)
         
         # 添加密码按钮
@@ -155,131 +189,298 @@ class MainWindow(QMainWindow):
     def setup_connections(self):
         """设置信号连接"""
         self.search_input.textChanged.connect(self.search_passwords)
+        self.fuzzy_search_checkbox.toggled.connect(self.search_controller.set_fuzzy)
+        self.type_filter_combo.currentIndexChanged.connect(self.on_type_filter_changed)
         self.category_tree.itemClicked.connect(self.load_passwords)
+        self.password_table.actionTriggered.connect(self.on_password_action)
+        # 滚动到底部时表格模型请求下一页
+        self.password_table.password_model.fetchMoreRequested.connect(self.load_more_passwords)
         
         # 初始化加载类别
         self.load_categories()
         
     def setup_auto_lock(self):
-        """设置自动锁定"""
-        self.lock_timer = QTimer()
+        """设置自动锁定：一段时间没有键盘和鼠标操作时锁定"""
+        self.locked = False
+        self.lock_timer = QTimer(self)
+        self.lock_timer.setSingleShot(True)
         self.lock_timer.setInterval(5 * 60 * 1000)  # 5分钟
         self.lock_timer.timeout.connect(self.lock_application)
+        self.lock_timer.start()
+        # 监听整个应用程序（包括对话框）的用户操作
+        QApplication.instance().installEventFilter(self)
+        
+    def eventFilter(self, watched, event):
+        """有键盘或鼠标操作时重新开始自动锁定计时"""
+        if event.type() in (QEvent.KeyPress, QEvent.MouseButtonPress, QEvent.Wheel):
+            self.on_user_activity()
+        return super().eventFilter(watched, event)
+        
+    def on_user_activity(self):
+        """用户操作：重新计时，锁定后重新建立搜索索引"""
+        self.lock_timer.start()
+        if self.locked:
+            self.locked = False
+            self.build_search_index()
+        
+    def build_search_index(self):
+        """在后台建立内存搜索索引，建立后搜索不再访问数据库"""
+        self.vault.submit(
+            "index", self.password_manager.build_search_index,
+            on_result=self.on_search_index_built, on_error=lambda message: print(f"建立搜索索引失败: {message}")
+        )
+        
+    def on_search_index_built(self, index):
+        """搜索索引建立完成"""
+        self.status_bar.showMessage(
+            f"搜索索引已建立: {len(index)} 条记录，约 {index.memory_usage() / 1024 / 1024:.1f} MB", 3000
+        )
+        
+    def convert_record_format(self):
+        """在后台把已有密文转换为当前设置的格式（紧凑格式/Fernet），完成后压缩数据库文件"""
+        compact = self.password_manager.encryption_manager.compact_records
+        # 新的转换开始前停止上一次的转换（提交同一key只丢弃旧任务的回调，不会停止已在执行的任务）
+        self.stop_record_conversion()
+        token = CancelToken()
+        self.convert_token = token
+        self.vault.submit(
+            "convert", self.password_manager.convert_records, compact, cancelled=lambda: token.cancelled,
+            on_result=self.on_record_format_converted,
+            on_error=lambda message: self.status_bar.showMessage(f"转换密码存储格式失败: {message}", 5000)
+        )
+        
+    def stop_record_conversion(self):
+        """在当前批次结束后停止后台的密文格式转换，下次转换时继续剩余的记录"""
+        if self.convert_token:
+            self.convert_token.cancel()
+            self.convert_token = None
+        self.vault.cancel("convert")
+        
+    def on_record_format_converted(self, count: int):
+        """密文格式转换完成"""
+        self.convert_token = None
+        if count:
+            self.status_bar.showMessage(f"已转换 {count} 条密码的存储格式", 3000)
+        
+    def resume_key_rotation(self):
+        """在后台继续未完成的数据密钥轮换（解锁时已加载旧密钥，未重新加密的记录可以正常读取）"""
+        if not KeyRotation.pending():
+            return
+        token = CancelToken()
+        self.rotation_token = token
+        self.vault.submit(
+            "rotate", KeyRotation(self.password_manager).run,
+            progress=self.rotationProgress.emit, cancelled=lambda: token.cancelled,
+            on_result=self.on_key_rotation_finished,
+            on_error=lambda message: self.status_bar.showMessage(f"轮换数据密钥失败: {message}", 5000)
+        )
+        
+    def pause_key_rotation(self):
+        """在当前批次结束后暂停后台的密钥轮换（检查点已保存）"""
+        if self.rotation_token:
+            self.rotation_token.cancel()
+            self.rotation_token = None
+        self.vault.cancel("rotate")
+        
+    def on_key_rotation_progress(self, done: int, total: int):
+        """显示密钥轮换进度"""
+        if self.rotation_token:
+            self.status_bar.showMessage(f"正在轮换数据密钥: {done:,} / {total:,}")
+        
+    def on_key_rotation_finished(self, finished: bool):
+        """后台密钥轮换结束"""
+        self.rotation_token = None
+        if finished:
+            self.status_bar.showMessage("数据密钥轮换完成", 3000)
         
     def show_settings(self):
         """显示设置对话框"""
+        # 设置中可以开始新的密钥轮换（需要等待正在执行的重新加密结束），
+        # 期间停止后台的格式转换和轮换，关闭后继续
+        self.stop_record_conversion()
+        self.pause_key_rotation()
         dialog = SettingsDialog(self)
-        dialog.exec_()
+        if dialog.exec_() and dialog.compact_records_changed:
+            self.password_manager.encryption_manager.compact_records = dialog.compact_records.isChecked()
+            self.status_bar.showMessage("正在转换密码存储格式...")
+        self.convert_record_format()
+        self.resume_key_rotation()
         
     def search_passwords(self, query: str):
         """搜索密码"""
         if not query:
             # 如果搜索框为空，恢复显示当前类别的所有密码
+            self.search_controller.cancel()
             current_item = self.category_tree.currentItem()
             if current_item:
                 self.load_passwords(current_item)
             return
-            
-        passwords = self.password_manager.search_passwords(query)
-        self.filtered_password_list = passwords  # 保存筛选后的密码列表
+        
+        self.vault.cancel("page")
+        self.search_controller.search(query)
+        
+    def on_type_filter_changed(self):
+        """切换连接类型筛选（对类别列表和搜索结果都有效）"""
+        self.password_table.password_model.set_type_filter(self.type_filter_combo.currentData())
+        self.show_password_count()
+        
+    def on_search_results(self, query: str, passwords):
+        """显示搜索结果"""
         self.is_filtered = True  # 设置筛选状态
         self.update_password_table(passwords)
+        # 与表格共用同一个列表，增删改后保持一致
+        self.filtered_password_list = self.password_table.password_model.rows()
         
     def load_passwords(self, category_item: QTreeWidgetItem):
         """加载指定类别的密码"""
         category_id = category_item.data(0, Qt.UserRole)
-        passwords = self.password_manager.get_passwords_by_category(category_id)
-        self.password_list = passwords  # 保存当前加载的密码列表
+        self.current_category_id = category_id
+        # 切换类别时取消上一个类别尚未完成的加载
+        self.vault.cancel("page")
+        self.total_passwords = None
+        # 重新加载说明数据可能已变化，不能再复用上一次的搜索结果
+        self.search_controller.reset()
+        # 先加载第一屏，其余分批加载（渐进加载）或在滚动时按需加载
+        limit = self.first_page_size if self.progressive_loading else self.page_size
+        self.vault.submit(
+            "list", self.password_manager.get_passwords_page, category_id, limit=limit,
+            on_result=lambda passwords: self.on_passwords_loaded(passwords, limit),
+            on_error=self.on_vault_error
+        )
+        if self.progressive_loading:
+            self.vault.submit(
+                "count", self.password_manager.count_passwords, category_id,
+                on_result=self.on_password_total_counted
+            )
+        else:
+            self.vault.cancel("count")
+        
+    def on_passwords_loaded(self, passwords, limit: int = None):
+        """显示类别的第一页密码"""
+        self.has_more_passwords = len(passwords) == (limit or self.page_size)
         self.filtered_password_list = []  # 清空筛选列表
         self.is_filtered = False  # 重置筛选状态
         self.update_password_table(passwords)
+        # 与表格共用同一个列表，追加的页和增删改都会反映到这里
+        self.password_list = self.password_table.password_model.rows()
+        self.continue_loading()
+        
+    def on_password_total_counted(self, total: int):
+        """当前类别的密码总数"""
+        self.total_passwords = total
+        self.show_password_count()
+        
+    def continue_loading(self):
+        """渐进加载时在后台继续加载下一批，每批显示后才请求下一批，界面始终可以响应"""
+        if self.progressive_loading and self.has_more_passwords and not self.is_filtered:
+            self.load_more_passwords()
+        
+    def load_more_passwords(self):
+        """加载当前类别的下一页密码"""
+        if self.is_filtered or not self.has_more_passwords or not self.password_list:
+            self.password_table.password_model.set_has_more(False)
+            return
+        if self.vault.is_running("page") or self.vault.is_running("list"):
+            return
+        self.vault.submit(
+            "page", self.password_manager.get_passwords_page,
+            self.current_category_id, after_id=self.password_list[-1].id, limit=self.page_size,
+            on_result=self.on_more_passwords_loaded, on_error=self.on_more_passwords_failed
+        )
+        
+    def on_more_passwords_loaded(self, passwords):
+        """在表格末尾追加下一页密码"""
+        self.has_more_passwords = len(passwords) == self.page_size
+        self.append_password_rows(passwords)
+        self.show_password_count()
+        self.continue_loading()
+        
+    def on_more_passwords_failed(self, message: str):
+        """加载下一页失败，允许滚动时重试"""
+        self.password_table.password_model.set_has_more(self.has_more_passwords)
+        self.on_vault_error(message)
+        
+    def on_vault_changed(self, changes):
+        """密码库写入后只更新表格中受影响的行，不重新查询，滚动位置和选中行保持不变"""
+        # 数据已变化，不能再在上一次的搜索结果中筛选
+        self.search_controller.reset()
+        self.refresh_category_counts()
+        model = self.password_table.password_model
+        model.remove_ids(changes.removed)
+        for row in changes.updated:
+            if self.is_filtered:
+                # 搜索结果只刷新已显示的行
+                model.update_row(row)
+            elif not self.in_current_category(row):
+                # 修改后移到了其他类别
+                model.remove_ids([row.id])
+            elif not model.update_row(row):
+                model.insert_by_id(row)
+        if not self.is_filtered:
+            for row in changes.inserted:
+                if self.in_current_category(row):
+                    model.insert_by_id(row)
+        self.show_password_count()
+        
+    def in_current_category(self, password) -> bool:
+        """密码是否属于当前显示的类别"""
+        return self.current_category_id == -1 or password.category_id == self.current_category_id
+        
+    def on_vault_error(self, message: str):
+        """后台操作失败"""
+        QMessageBox.warning(self, "错误", f"读取密码库失败: {message}")
         
     def update_password_table(self, passwords):
-        """更新密码表格"""
-        self.password_table.setRowCount(0)  # 清空表格
-        self.password_table.setColumnCount(6)  # 增加一列用于显示密码类型
-        self.password_table.setHorizontalHeaderLabels(["标题", "用户名", "密码", "密码类型", "连接信息", "操作"])
-        
-        # 调整列宽
-        header = self.password_table.horizontalHeader()
-        self.password_table.setColumnWidth(0, 150)  # 标题列固定宽度
-        self.password_table.setColumnWidth(1, 120)  # 用户名列固定宽度
-        header.setSectionResizeMode(2, QHeaderView.ResizeToContents)  # 密码列自适应内容
-        header.setSectionResizeMode(3, QHeaderView.ResizeToContents)  # 密码类型列自适应内容
-        header.setSectionResizeMode(4, QHeaderView.Stretch)  # 连接信息列自适应
-        
-        self.password_table.setRowCount(len(passwords))
-        for row, password in enumerate(passwords):
-            # 设置行高
-            self.password_table.setRowHeight(row, 40)
-            
-            # 设置各列内容
-            title_item = QTableWidgetItem(password.title)
-            title_item.setData(Qt.UserRole, password.id)
-            self.password_table.setItem(row, 0, title_item)
-            
-            username_item = QTableWidgetItem(password.username)
-            self.password_table.setItem(row, 1, username_item)
-            
-            password_item = QTableWidgetItem("••••••••")
-            password_item.setTextAlignment(Qt.AlignCenter)
-            password_item.setFont(QFont("SF Pro Display", 12))
-            self.password_table.setItem(row, 2, password_item)
-            
-            # 密码类型
-            password_type = password.connection_type if password.connection_type else "普通密码"
-            type_item = QTableWidgetItem(password_type)
-            type_item.setTextAlignment(Qt.AlignCenter)
-            self.password_table.setItem(row, 3, type_item)
-            
-            # 连接信息
-            conn_info = ""
-            if password.host:
-                conn_info = f"{password.host}"
-                if password.port:
-                    conn_info += f":{password.port}"
-            conn_info_item = QTableWidgetItem(conn_info)
-            self.password_table.setItem(row, 4, conn_info_item)
-            
-            # 添加操作按钮
-            actions_widget = QWidget()
-            actions_layout = QHBoxLayout(actions_widget)
-            actions_layout.setContentsMargins(5, 0, 5, 0)
-            actions_layout.setSpacing(5)
-            
-            copy_btn = QPushButton("复制")
-            copy_btn.setFixedSize(60, 30)
-            copy_btn.clicked.connect(lambda checked=False, p=password: self.copy_password(p))
-            actions_layout.addWidget(copy_btn)
-            
-            # 快速连接按钮
-            if password.connection_type in ['RDP', 'SSH']:
-                connect_btn = QPushButton("连接")
-                connect_btn.setFixedSize(60, 30)
-                connect_btn.clicked.connect(lambda checked=False, p=password: self.connect_to_service(p))
-                actions_layout.addWidget(connect_btn)
-            
-            edit_btn = QPushButton("编辑")
-            edit_btn.setFixedSize(60, 30)
-            edit_btn.clicked.connect(lambda checked=False, p=password: self.edit_password(p))
-            actions_layout.addWidget(edit_btn)
-            
-            delete_btn = QPushButton("删除")
-            delete_btn.setObjectName("dangerButton")
-            delete_btn.setFixedSize(60, 30)
-            delete_btn.clicked.connect(lambda checked=False, p=password: self.delete_password(p))
-            actions_layout.addWidget(delete_btn)
-            
-            self.password_table.setCellWidget(row, 5, actions_widget)
+        """更新密码表格
+        
+        passwords可以是完整的Password记录，也可以是只包含显示列的PasswordSummary
+        """
+        self.password_table.password_model.set_rows(
+            passwords, has_more=self.has_more_passwords and not self.is_filtered
+        )
         
         # 显示密码数量信息
-        self.status_bar.showMessage(f"共 {len(passwords)} 个密码")
+        self.show_password_count()
+        
+    def append_password_rows(self, passwords):
+        """在表格末尾追加密码行"""
+        self.password_table.password_model.append_rows(
+            passwords, has_more=self.has_more_passwords and not self.is_filtered
+        )
+        
+    def show_password_count(self):
+        """在状态栏显示密码数量"""
+        model = self.password_table.password_model
+        count = model.loaded_count()
+        if self.has_more_passwords and not self.is_filtered:
+            if self.progressive_loading and self.total_passwords is not None:
+                message = f"已加载 {count:,} / {max(self.total_passwords, count):,}"
+            elif self.progressive_loading:
+                message = f"已加载 {count:,} 个密码，正在加载..."
+            else:
+                message = f"已加载 {count} 个密码，滚动加载更多"
+        else:
+            message = f"共 {count} 个密码"
+        if model.type_filter() is not None:
+            message += f"，筛选后显示 {model.rowCount()} 个"
+        self.status_bar.showMessage(message)
+        
+    def on_password_action(self, action: str, password):
+        """处理表格操作列的按钮点击"""
+        if action == "copy":
+            self.copy_password(password)
+        elif action == "connect":
+            self.connect_to_service(password)
+        elif action == "edit":
+            self.edit_password(password)
+        elif action == "delete":
+            self.delete_password(password)
         
     def copy_password(self, password):
         """复制密码到剪贴板"""
         try:
-            # 获取解密的密码
-            decrypted_password = self.password_manager.get_password(password.id).decrypted_password
+            # 只在复制时解密这一条密码
+            decrypted_password = self.password_manager.get_decrypted_password(password.id)
             # 复制到剪贴板
             pyperclip.copy(decrypted_password)
             self.status_bar.showMessage("密码已复制到剪贴板", 3000)
@@ -389,8 +590,7 @@ class MainWindow(QMainWindow):
             
             # 显示对话框
             if dialog.exec_():
-                # 重新加载密码列表
-                self.load_passwords(self.category_tree.currentItem())
+                # 表格由写入通知更新（见on_vault_changed）
                 self.status_bar.showMessage("密码已更新", 3000)
         
         except Exception as e:
@@ -408,13 +608,17 @@ class MainWindow(QMainWindow):
         if reply == QMessageBox.Yes:
             if self.password_manager.delete_password(password.id):
                 self.status_bar.showMessage("密码已删除", 3000)
-                self.load_passwords(self.category_tree.currentItem())
             else:
                 QMessageBox.warning(self, "错误", "删除密码失败")
                 
     def lock_application(self):
         """锁定应用程序"""
-        # TODO: 实现应用程序锁定功能 
+        self.locked = True
+        # 丢弃内存中缓存的明文密码和搜索索引
+        self.password_manager.clear_secret_cache()
+        self.vault.cancel("index")
+        self.password_manager.discard_search_index()
+        # TODO: 实现应用程序锁定功能
 
     def load_categories(self):
         """加载分类树"""
@@ -423,26 +627,39 @@ class MainWindow(QMainWindow):
         # 添加"全部"节点
         all_item = QTreeWidgetItem(["全部"])
         all_item.setData(0, Qt.UserRole, -1)  # 使用-1表示"全部"
+        all_item.setData(0, CATEGORY_NAME_ROLE, "全部")
         self.category_tree.addTopLevelItem(all_item)
         
-        # 加载数据库中的分类
-        session = self.password_manager.Session()
-        try:
-            categories = session.query(Category).all()
-            for category in categories:
-                item = QTreeWidgetItem([category.name])
-                item.setData(0, Qt.UserRole, category.id)
-                self.category_tree.addTopLevelItem(item)
-        finally:
-            session.close()
+        # 加载数据库中的分类（只加载名称，密码在选中类别时才加载）
+        for category in self.password_manager.get_categories():
+            item = QTreeWidgetItem([category.name])
+            item.setData(0, Qt.UserRole, category.id)
+            item.setData(0, CATEGORY_NAME_ROLE, category.name)
+            self.category_tree.addTopLevelItem(item)
         
         # 默认选中"全部"
         self.category_tree.setCurrentItem(all_item)
+        self.refresh_category_counts()
         
         # 只有当加密管理器已初始化时才加载密码
         if self.password_manager.encryption_manager and self.password_manager.encryption_manager.cipher_suite:
             self.load_passwords(all_item)
         
+    def refresh_category_counts(self):
+        """在后台获取各类别的密码数量（有缓存时直接返回）"""
+        self.vault.submit(
+            "counts", self.password_manager.get_category_counts,
+            on_result=self.show_category_counts
+        )
+        
+    def show_category_counts(self, counts):
+        """在类别名称后显示密码数量，例如：生产服务器 (128)"""
+        for i in range(self.category_tree.topLevelItemCount()):
+            item = self.category_tree.topLevelItem(i)
+            category_id = item.data(0, Qt.UserRole)
+            count = sum(counts.values()) if category_id == -1 else counts.get(category_id, 0)
+            item.setText(0, f"{item.data(0, CATEGORY_NAME_ROLE)} ({count})")
+        
     def manage_categories(self):
         """管理分类"""
         dialog = CategoryDialog(self, self.password_manager)
@@ -454,8 +671,7 @@ class MainWindow(QMainWindow):
         """添加密码"""
         dialog = AddPasswordDialog(self, self.password_manager)
         if dialog.exec_():
-            # 刷新显示
-            self.load_passwords(self.category_tree.currentItem())
+            self.status_bar.showMessage("密码已添加", 3000)
 
     def connect_to_service(self, password):
         """连接到服务"""
@@ -465,7 +681,7 @@ class MainWindow(QMainWindow):
                 return
                 
             # 获取解密后的密码
-            decrypted_password = self.password_manager.get_password(password.id).decrypted_password
+            decrypted_password = self.password_manager.get_decrypted_password(password.id)
             
             if password.connection_type == "RDP":
                 ConnectionManager.connect_rdp(
@@ -522,6 +738,13 @@ class MainWindow(QMainWindow):
         # 3秒后隐藏
         QTimer.singleShot(3000, notification.deleteLater) 
 
+    def closeEvent(self, event):
+        """窗口关闭时等待后台任务结束"""
+        self.stop_record_conversion()
+        self.pause_key_rotation()
+        self.vault.close(3000)
+        super().closeEvent(event)
+
     def toggle_maximize(self):
         """切换窗口最大化/还原状态"""
         if self.isMaximized():
@@ -572,20 +795,53 @@ class MainWindow(QMainWindow):
             if not file_path.lower().endswith('.xlsx'):
                 file_path += '.xlsx'
             
-            # 确定要导出的密码列表
-            passwords_to_export = self.filtered_password_list if self.is_filtered else self.password_list
-            
-            # 执行导出
-            success = ImportExportManager.export_to_xlsx(passwords_to_export, file_path)
-            
-            if success:
-                QMessageBox.information(self, "成功", f"已成功导出 {len(passwords_to_export)} 个密码到 {file_path}")
-            else:
-                QMessageBox.warning(self, "失败", "导出密码失败")
+            # 确定要导出的密码：筛选结果按ID导出，否则导出整个类别（可能只加载了部分页）
+            password_ids = None
+            if self.is_filtered:
+                password_ids = [password.id for password in self.filtered_password_list]
+            
+            # 在后台线程加载完整记录、解密并写入文件
+            self.export_button_busy(True)
+            self.vault.submit(
+                "export", self._export_passwords_to_file, file_path, password_ids, self.current_category_id,
+                on_result=lambda count: self.on_export_finished(count, file_path),
+                on_error=self.on_export_failed
+            )
                 
         except Exception as e:
             QMessageBox.critical(self, "错误", f"导出过程中发生错误: {str(e)}")
     
+    def _export_passwords_to_file(self, file_path: str, password_ids, category_id: int) -> int:
+        """加载完整记录、解密并导出（在后台线程执行）"""
+        if password_ids is not None:
+            passwords = self.password_manager.get_passwords_by_ids(password_ids)
+        else:
+            passwords = [
+                password
+                for page in self.password_manager.iter_passwords(category_id, summary=False)
+                for password in page
+            ]
+        self.password_manager.decrypt_passwords(passwords)
+        if not ImportExportManager.export_to_xlsx(passwords, file_path):
+            raise RuntimeError("导出密码失败")
+        return len(passwords)
+    
+    def on_export_finished(self, count: int, file_path: str):
+        """导出完成"""
+        self.export_button_busy(False)
+        QMessageBox.information(self, "成功", f"已成功导出 {count} 个密码到 {file_path}")
+    
+    def on_export_failed(self, message: str):
+        """导出失败"""
+        self.export_button_busy(False)
+        QMessageBox.critical(self, "错误", f"导出过程中发生错误: {message}")
+    
+    def export_button_busy(self, busy: bool):
+        """导入导出进行中时禁用按钮"""
+        self.import_export_button.setEnabled(not busy)
+        if busy:
+            self.status_bar.showMessage("正在处理，请稍候...")
+    
     def import_passwords(self):
         """从Excel文件导入密码"""
         try:
@@ -608,31 +864,37 @@ class MainWindow(QMainWindow):
             if reply != QMessageBox.Yes:
                 return
             
-            # 执行导入
-            success_count, fail_count, error_message = ImportExportManager.import_from_xlsx(
-                file_path, self.password_manager
+            # 在后台线程执行导入
+            self.export_button_busy(True)
+            self.vault.submit(
+                "import", ImportExportManager.import_from_xlsx, file_path, self.password_manager,
+                on_result=self.on_import_finished, on_error=self.on_import_failed
             )
-            
-            # 显示导入结果
-            if success_count > 0:
-                # 重新加载密码列表
-                current_item = self.category_tree.currentItem()
-                if current_item:
-                    self.load_passwords(current_item)
-                
-                result_message = f"导入完成:\n成功: {success_count} 条记录"
-                if fail_count > 0:
-                    result_message += f"\n失败: {fail_count} 条记录"
-                    if error_message:
-                        result_message += f"\n\n错误详情:\n{error_message}"
-                
-                # 根据是否有失败决定显示什么类型的消息框
-                if fail_count > 0:
-                    QMessageBox.warning(self, "导入结果", result_message)
-                else:
-                    QMessageBox.information(self, "导入成功", result_message)
-            else:
-                QMessageBox.critical(self, "导入失败", f"导入失败，没有成功导入任何记录。\n\n{error_message}")
                 
         except Exception as e:
-            QMessageBox.critical(self, "错误", f"导入过程中发生错误: {str(e)}")
\ No newline at end of file
+            QMessageBox.critical(self, "错误", f"导入过程中发生错误: {str(e)}")
+    
+    def on_import_finished(self, result: tuple):
+        """导入完成，显示导入结果"""
+        self.export_button_busy(False)
+        success_count, fail_count, error_message = result
+        if success_count > 0:
+            # 导入的记录已由写入通知加入表格
+            result_message = f"导入完成:\n成功: {success_count} 条记录"
+            if fail_count > 0:
+                result_message += f"\n失败: {fail_count} 条记录"
+                if error_message:
+                    result_message += f"\n\n错误详情:\n{error_message}"
+            
+            # 根据是否有失败决定显示什么类型的消息框
+            if fail_count > 0:
+                QMessageBox.warning(self, "导入结果", result_message)
+            else:
+                QMessageBox.information(self, "导入成功", result_message)
+        else:
+            QMessageBox.critical(self, "导入失败", f"导入失败，没有成功导入任何记录。\n\n{error_message}")
+    
+    def on_import_failed(self, message: str):
+        """导入失败"""
+        self.export_button_busy(False)
+        QMessageBox.critical(self, "错误", f"导入过程中发生错误: {message}")
@@ -0,0 +1,641 @@
+"""
+密码表格模块 - 基于模型/视图的密码列表
+
+表格只保存行记录（PasswordSummary），文字和操作按钮在绘制可见行时才生成，
+不再为每一行创建单元格对象和按钮控件，内存和耗时只与可见行数有关。
+"""
+import functools
+from typing import Callable, Dict, List, Optional, Tuple
+from PySide6.QtCore import (Qt, QAbstractTableModel, QEvent, QModelIndex, QObject, QRect, QRunnable, QSize,
+                            QThreadPool, Signal)
+from PySide6.QtGui import QFont, QPainter, QPixmap
+from PySide6.QtWidgets import (QTableView, QStyledItemDelegate, QStyleOptionButton, QStyle,
+                               QPushButton, QHeaderView, QAbstractItemView, QMenu)
+
+# 列标题，操作列由ActionButtonDelegate绘制
+COLUMNS = ("标题", "用户名", "密码", "密码类型", "连接信息", "操作")
+PASSWORD_COLUMN = 2
+TYPE_COLUMN = 3
+ACTION_COLUMN = 5
+MASKED_PASSWORD = "••••••••"
+ROW_HEIGHT = 40
+
+# 可以快速连接的连接类型
+CONNECTABLE_TYPES = ("RDP", "SSH")
+
+
+def _text_key(value: Optional[str]) -> str:
+    return (value or "").lower()
+
+
+# 可排序的列及其排序键
+SORT_KEYS: Dict[int, Callable] = {
+    0: lambda row: _text_key(row.title),
+    1: lambda row: _text_key(row.username),
+    TYPE_COLUMN: lambda row: row.connection_type or "",
+    4: lambda row: (row.host or "", row.port or 0),
+}
+MAX_SORT_COLUMNS = 3  # 多列排序最多保留的列数
+ASYNC_ARRANGE_THRESHOLD = 20000  # 已加载行数超过该值时在后台线程排序
+
+
+def _bisect_left(items: List, value, key: Callable) -> int:
+    """第一个key(item) >= value的位置（bisect的key参数需要Python 3.10）"""
+    low, high = 0, len(items)
+    while low < high:
+        middle = (low + high) // 2
+        if key(items[middle]) < value:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def _bisect_right(items: List, value, key: Callable) -> int:
+    """第一个key(item) > value的位置"""
+    low, high = 0, len(items)
+    while low < high:
+        middle = (low + high) // 2
+        if value < key(items[middle]):
+            high = middle
+        else:
+            low = middle + 1
+    return low
+
+
+def arrange_rows(rows: List, sort_spec: List[Tuple[int, Qt.SortOrder]], type_filter: Optional[str]) -> List:
+    """按连接类型筛选并排序
+
+    多列排序从次要列到主要列依次做稳定排序，各列可以分别升序或降序。
+
+    Args:
+        rows: 行记录
+        sort_spec: [(列, 升序/降序), ...]，第一个为主要排序列，为空时保持原顺序
+        type_filter: 只保留该连接类型，""表示普通密码，None表示不筛选
+    """
+    if type_filter is not None:
+        rows = [row for row in rows if (row.connection_type or "") == type_filter]
+    else:
+        rows = list(rows)
+    for column, order in reversed(sort_spec):
+        rows.sort(key=SORT_KEYS[column], reverse=order == Qt.DescendingOrder)
+    return rows
+
+
+class _ArrangeSignals(QObject):
+    finished = Signal(int, object)
+
+
+class _ArrangeTask(QRunnable):
+    """在线程池中筛选排序（行记录是快照，不会在排序时被修改）"""
+
+    def __init__(self, generation: int, rows: List, sort_spec, type_filter, signals: _ArrangeSignals):
+        super().__init__()
+        self.generation = generation
+        self.rows = rows
+        self.sort_spec = sort_spec
+        self.type_filter = type_filter
+        self.signals = signals
+
+    def run(self):
+        self.signals.finished.emit(self.generation, arrange_rows(self.rows, self.sort_spec, self.type_filter))
+
+
+class PasswordTableModel(QAbstractTableModel):
+    """密码列表模型
+
+    行记录可以是PasswordSummary，也可以是完整的Password。
+    模型保存已加载的全部行（加载顺序，类别列表为ID顺序）和显示的行（按连接类型筛选、按列排序后），
+    排序和筛选只在内存中进行，不重新查询数据库；已加载的行很多时排序在后台线程执行，完成后再更新显示。
+    还有更多页未加载时，视图滚动到底部会调用fetchMore，模型发出fetchMoreRequested，
+    由窗口在后台加载下一页后调用append_rows追加。
+    """
+    fetchMoreRequested = Signal()
+    RowRole = Qt.UserRole  # data()返回整条行记录
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._loaded = []  # 已加载的全部行
+        self._loaded_positions: Optional[dict] = None  # 密码ID -> _loaded中的位置，按需建立
+        self._rows = []  # 显示的行
+        self._positions: Optional[dict] = None  # 密码ID -> 显示的行号，按需建立
+        self._sort_spec: List[Tuple[int, Qt.SortOrder]] = []
+        self._type_filter: Optional[str] = None
+        self._has_more = False
+        self._fetching = False
+        self._generation = 0  # 每次重新筛选排序时加1，用于丢弃过期的后台排序结果
+        self._arranging = False  # 是否有后台排序未完成
+        self._arrange_signals = _ArrangeSignals(self)
+        self._arrange_signals.finished.connect(self._on_arranged)
+        self._password_font = QFont("SF Pro Display", 12)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section: int, orientation, role: int = Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return COLUMNS[section]
+        return None
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        column = index.column()
+        if role == Qt.DisplayRole:
+            return self._display_text(row, column)
+        if role == self.RowRole:
+            return row
+        if role == Qt.TextAlignmentRole and column in (PASSWORD_COLUMN, TYPE_COLUMN):
+            return Qt.AlignCenter
+        if role == Qt.FontRole and column == PASSWORD_COLUMN:
+            return self._password_font
+        return None
+
+    @staticmethod
+    def _display_text(row, column: int) -> Optional[str]:
+        """单元格显示的文字"""
+        if column == 0:
+            return row.title
+        if column == 1:
+            return row.username
+        if column == PASSWORD_COLUMN:
+            return MASKED_PASSWORD
+        if column == TYPE_COLUMN:
+            return row.connection_type if row.connection_type else "普通密码"
+        if column == 4:
+            if not row.host:
+                return ""
+            return f"{row.host}:{row.port}" if row.port else row.host
+        return None
+
+    def set_rows(self, rows: List, has_more: bool = False):
+        """替换全部行"""
+        self._loaded = list(rows)
+        self._loaded_positions = None
+        self._has_more = has_more
+        self._fetching = False
+        self._rearrange(reset=True)
+
+    def append_rows(self, rows: List, has_more: bool = False):
+        """在末尾追加行（下一页）"""
+        self._has_more = has_more
+        self._fetching = False
+        if not rows:
+            return
+        first = len(self._loaded)
+        self._loaded.extend(rows)
+        if self._loaded_positions is not None:
+            self._loaded_positions.update((row.id, position) for position, row in enumerate(rows, first))
+        accepted = [row for row in rows if self._accepts(row)]
+        if accepted:
+            self._insert_visible_rows(len(self._rows), accepted)
+        if self._sort_spec:
+            self._rearrange()
+
+    def find_row(self, password_id: int) -> int:
+        """密码ID所在的显示行号，不在显示的行中时返回-1"""
+        if self._positions is None:
+            self._positions = {row.id: position for position, row in enumerate(self._rows)}
+        return self._positions.get(password_id, -1)
+
+    def _find_loaded(self, password_id: int) -> int:
+        """密码ID在已加载的行中的位置，未加载时返回-1"""
+        if self._loaded_positions is None:
+            self._loaded_positions = {row.id: position for position, row in enumerate(self._loaded)}
+        return self._loaded_positions.get(password_id, -1)
+
+    def update_row(self, row) -> bool:
+        """替换同一ID的行，返回该行是否已加载
+
+        仍然显示在原位置时只重绘这一行；筛选或排序位置变化时移动到新位置
+        """
+        position = self._find_loaded(row.id)
+        if position < 0:
+            return False
+        self._loaded[position] = row
+        visible = self.find_row(row.id)
+        if visible >= 0 and self._accepts(row) and self._in_order(visible, row):
+            self._rows[visible] = row
+            self.dataChanged.emit(self.index(visible, 0), self.index(visible, len(COLUMNS) - 1))
+        else:
+            if visible >= 0:
+                self._remove_visible_row(visible)
+            if self._accepts(row):
+                self._insert_visible_row(row)
+        self._restart_arrange()
+        return True
+
+    def insert_by_id(self, row) -> bool:
+        """按ID顺序插入一行（表格按ID顺序分页加载时使用）
+
+        插入位置在末尾且还有未加载的页时不插入，这一行会随后续的页加载，返回是否已插入
+        """
+        position = _bisect_left(self._loaded, row.id, key=lambda item: item.id)
+        if position == len(self._loaded) and self._has_more:
+            return False
+        self._loaded.insert(position, row)
+        self._loaded_positions = None
+        if self._accepts(row):
+            self._insert_visible_row(row)
+        self._restart_arrange()
+        return True
+
+    def remove_ids(self, password_ids) -> int:
+        """删除指定ID的行，返回删除的已加载行数"""
+        password_ids = {password_id for password_id in password_ids if self._find_loaded(password_id) >= 0}
+        if not password_ids:
+            return 0
+        # 原地修改，调用方持有的rows()列表保持一致
+        self._loaded[:] = [row for row in self._loaded if row.id not in password_ids]
+        self._loaded_positions = None
+        positions = sorted((position for position in map(self.find_row, password_ids) if position >= 0),
+                           reverse=True)
+        for position in positions:
+            self._remove_visible_row(position)
+        self._restart_arrange()
+        return len(password_ids)
+
+    def _insert_visible_rows(self, position: int, rows: List):
+        self.beginInsertRows(QModelIndex(), position, position + len(rows) - 1)
+        self._rows[position:position] = rows
+        self._positions = None
+        self.endInsertRows()
+
+    def _insert_visible_row(self, row):
+        """把一行插入到显示的行中：有排序时按排序位置，否则按加载顺序"""
+        if self._sort_spec:
+            key = functools.cmp_to_key(self._compare)
+            position = _bisect_right(self._rows, key(row), key=key)
+        else:
+            position = _bisect_left(self._rows, self._find_loaded(row.id),
+                                    key=lambda item: self._find_loaded(item.id))
+        self._insert_visible_rows(position, [row])
+
+    def _remove_visible_row(self, position: int):
+        self.beginRemoveRows(QModelIndex(), position, position)
+        del self._rows[position]
+        self._positions = None
+        self.endRemoveRows()
+
+    def _accepts(self, row) -> bool:
+        """是否通过连接类型筛选"""
+        return self._type_filter is None or (row.connection_type or "") == self._type_filter
+
+    def _compare(self, a, b) -> int:
+        """按当前排序规则比较两行"""
+        for column, order in self._sort_spec:
+            key_a, key_b = SORT_KEYS[column](a), SORT_KEYS[column](b)
+            if key_a != key_b:
+                result = -1 if key_a < key_b else 1
+                return result if order == Qt.AscendingOrder else -result
+        return 0
+
+    def _in_order(self, position: int, row) -> bool:
+        """row放在position时是否仍符合排序"""
+        if not self._sort_spec:
+            return True
+        if position > 0 and self._compare(self._rows[position - 1], row) > 0:
+            return False
+        if position + 1 < len(self._rows) and self._compare(row, self._rows[position + 1]) > 0:
+            return False
+        return True
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.AscendingOrder):
+        """按列排序（点击表头时由视图调用）
+
+        之前的排序列作为次要排序列保留，column为-1时恢复加载顺序
+        """
+        if column == -1:
+            self._sort_spec = []
+        elif column in SORT_KEYS:
+            others = [spec for spec in self._sort_spec if spec[0] != column]
+            self._sort_spec = ([(column, order)] + others)[:MAX_SORT_COLUMNS]
+        else:
+            return
+        self._rearrange()
+
+    def sort_spec(self) -> List[Tuple[int, Qt.SortOrder]]:
+        """当前的排序规则，第一个为主要排序列"""
+        return list(self._sort_spec)
+
+    def set_type_filter(self, type_filter: Optional[str]):
+        """只显示指定连接类型的行，""表示普通密码，None表示全部"""
+        if type_filter == self._type_filter:
+            return
+        self._type_filter = type_filter
+        self._rearrange(reset=True)
+
+    def type_filter(self) -> Optional[str]:
+        return self._type_filter
+
+    def _rearrange(self, reset: bool = False):
+        """重新筛选排序显示的行
+
+        reset为True时（换了数据或筛选条件）立即显示筛选结果；
+        已加载的行较多且需要排序时，排序在后台线程执行，完成后保持选中行更新显示
+        """
+        self._generation += 1
+        self._arranging = False
+        if len(self._loaded) <= ASYNC_ARRANGE_THRESHOLD or not self._sort_spec:
+            rows = arrange_rows(self._loaded, self._sort_spec, self._type_filter)
+            if reset:
+                self._reset_visible(rows)
+            else:
+                self._relayout(rows)
+            return
+        if reset:
+            self._reset_visible(arrange_rows(self._loaded, [], self._type_filter))
+        self._arranging = True
+        QThreadPool.globalInstance().start(_ArrangeTask(
+            self._generation, list(self._loaded), list(self._sort_spec), self._type_filter, self._arrange_signals
+        ))
+
+    def _restart_arrange(self):
+        """后台排序期间数据有变化时，排序结果已过期，重新排序"""
+        if self._arranging:
+            self._rearrange()
+
+    def _on_arranged(self, generation: int, rows: List):
+        if generation != self._generation:
+            return
+        self._arranging = False
+        self._relayout(rows)
+
+    def _reset_visible(self, rows: List):
+        self.beginResetModel()
+        self._rows = rows
+        self._positions = None
+        self.endResetModel()
+
+    def _relayout(self, rows: List):
+        """替换显示的行并保持选中行、当前行（持久索引）指向同一条记录"""
+        self.layoutAboutToBeChanged.emit()
+        old_indexes = self.persistentIndexList()
+        old_ids = [self._rows[index.row()].id for index in old_indexes]
+        self._rows = rows
+        self._positions = None
+        new_indexes = []
+        for index, password_id in zip(old_indexes, old_ids):
+            position = self.find_row(password_id)
+            new_indexes.append(self.index(position, index.column()) if position >= 0 else QModelIndex())
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.layoutChanged.emit()
+
+    def set_has_more(self, has_more: bool):
+        """设置是否还有未加载的页（加载下一页失败时调用，允许再次加载）"""
+        self._has_more = has_more
+        self._fetching = False
+
+    def rows(self) -> List:
+        """已加载的全部行记录（加载顺序，不受筛选和排序影响）"""
+        return self._loaded
+
+    def loaded_count(self) -> int:
+        """已加载的行数"""
+        return len(self._loaded)
+
+    def row_at(self, row: int):
+        """第row个显示行的记录"""
+        return self._rows[row]
+
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()) -> bool:
+        return not parent.isValid() and self._has_more and not self._fetching
+
+    def fetchMore(self, parent: QModelIndex = QModelIndex()):
+        if self.canFetchMore(parent):
+            self._fetching = True
+            self.fetchMoreRequested.emit()
+
+
+class ActionButtonDelegate(QStyledItemDelegate):
+    """绘制操作列的按钮（复制、连接、编辑、删除）并处理点击
+
+    按钮不是真实的控件，只按样式表绘制；点击时发出actionTriggered(动作, 行记录)，
+    动作为"copy"、"connect"、"edit"、"delete"之一。
+    """
+    actionTriggered = Signal(str, object)
+
+    BUTTON_WIDTH = 60
+    BUTTON_HEIGHT = 30
+    SPACING = 5
+    MARGIN = 5
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # 不显示的按钮，只用作绘制时的样式来源（应用样式表中QPushButton和#dangerButton的样式）
+        self._button = QPushButton()
+        self._danger_button = QPushButton()
+        self._danger_button.setObjectName("dangerButton")
+        self._hover: Optional[Tuple[int, str]] = None  # 鼠标所在的(行, 动作)
+        self._pressed: Optional[Tuple[int, str]] = None  # 按下的(行, 动作)
+        self._pixmaps: Dict[tuple, QPixmap] = {}  # (动作, 按钮文字, 悬停, 按下, 像素比) -> 按钮图像
+
+    @staticmethod
+    def actions(row) -> List[Tuple[str, str]]:
+        """行记录可用的操作：[(动作, 按钮文字), ...]"""
+        actions = [("copy", "复制")]
+        if row.connection_type in CONNECTABLE_TYPES:
+            actions.append(("connect", "连接"))
+        actions.append(("edit", "编辑"))
+        actions.append(("delete", "删除"))
+        return actions
+
+    def _button_rects(self, rect: QRect, row) -> List[Tuple[str, str, QRect]]:
+        """计算单元格中每个按钮的位置"""
+        top = rect.top() + (rect.height() - self.BUTTON_HEIGHT) // 2
+        left = rect.left() + self.MARGIN
+        buttons = []
+        for action, label in self.actions(row):
+            buttons.append((action, label, QRect(left, top, self.BUTTON_WIDTH, self.BUTTON_HEIGHT)))
+            left += self.BUTTON_WIDTH + self.SPACING
+        return buttons
+
+    def _hit(self, rect: QRect, row, position) -> Optional[str]:
+        """坐标所在的按钮动作"""
+        for action, _, button_rect in self._button_rects(rect, row):
+            if button_rect.contains(position):
+                return action
+        return None
+
+    def paint(self, painter, option, index: QModelIndex):
+        # 先绘制背景（选中、交替行颜色）
+        super().paint(painter, option, index)
+        row = index.data(PasswordTableModel.RowRole)
+        ratio = painter.device().devicePixelRatioF()
+        for action, label, rect in self._button_rects(option.rect, row):
+            hover = self._hover == (index.row(), action)
+            pressed = self._pressed == (index.row(), action)
+            painter.drawPixmap(rect.topLeft(), self._button_pixmap(action, label, hover, pressed, ratio))
+
+    def _button_pixmap(self, action: str, label: str, hover: bool, pressed: bool, ratio: float) -> QPixmap:
+        """按钮图像，每种(动作, 状态)只按样式绘制一次，之后重绘直接复用"""
+        key = (action, label, hover, pressed, ratio)
+        pixmap = self._pixmaps.get(key)
+        if pixmap is None:
+            state = QStyle.State_Enabled | QStyle.State_Raised
+            if hover:
+                state |= QStyle.State_MouseOver
+            if pressed:
+                state |= QStyle.State_Sunken
+            button = self._danger_button if action == "delete" else self._button
+            pixmap = QPixmap(round(self.BUTTON_WIDTH * ratio), round(self.BUTTON_HEIGHT * ratio))
+            pixmap.setDevicePixelRatio(ratio)
+            pixmap.fill(Qt.transparent)
+            button_option = QStyleOptionButton()
+            button_option.initFrom(button)
+            button_option.rect = QRect(0, 0, self.BUTTON_WIDTH, self.BUTTON_HEIGHT)
+            button_option.text = label
+            button_option.state = state
+            pixmap_painter = QPainter(pixmap)
+            button.style().drawControl(QStyle.CE_PushButton, button_option, pixmap_painter, button)
+            pixmap_painter.end()
+            self._pixmaps[key] = pixmap
+        return pixmap
+
+    def clear_cache(self):
+        """样式表变化后丢弃缓存的按钮图像"""
+        self._pixmaps.clear()
+
+    def sizeHint(self, option, index: QModelIndex) -> QSize:
+        count = len(self.actions(index.data(PasswordTableModel.RowRole)))
+        return QSize(self.width_for(count), ROW_HEIGHT)
+
+    @classmethod
+    def width_for(cls, button_count: int) -> int:
+        """放下button_count个按钮所需的宽度"""
+        return cls.MARGIN * 2 + cls.BUTTON_WIDTH * button_count + cls.SPACING * (button_count - 1)
+
+    def set_hover(self, hover: Optional[Tuple[int, str]]) -> bool:
+        """设置鼠标所在的按钮，返回是否有变化"""
+        if hover == self._hover:
+            return False
+        self._hover = hover
+        return True
+
+    def editorEvent(self, event, model, option, index: QModelIndex) -> bool:
+        event_type = event.type()
+        if event_type not in (QEvent.MouseButtonPress, QEvent.MouseButtonRelease, QEvent.MouseMove):
+            return False
+        row = index.data(PasswordTableModel.RowRole)
+        action = self._hit(option.rect, row, event.position().toPoint())
+        target = (index.row(), action) if action else None
+
+        if event_type == QEvent.MouseMove:
+            if self.set_hover(target):
+                self._repaint(option)
+            return False
+        if event.button() != Qt.LeftButton:
+            return False
+        if event_type == QEvent.MouseButtonPress:
+            self._pressed = target
+            self._repaint(option)
+            return target is not None
+        pressed, self._pressed = self._pressed, None
+        self._repaint(option)
+        if target is not None and target == pressed:
+            self.actionTriggered.emit(action, row)
+            return True
+        return False
+
+    @staticmethod
+    def _repaint(option):
+        """重绘按钮所在的单元格"""
+        if option.widget is not None:
+            option.widget.viewport().update(option.rect)
+
+
+class PasswordTableView(QTableView):
+    """密码表格视图：PasswordTableModel + 操作列按钮代理
+
+    点击表头排序（再次点击切换升序/降序，之前的排序列作为次要排序），右键表头可恢复加载顺序
+    """
+    actionTriggered = Signal(str, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.password_model = PasswordTableModel(self)
+        self.setModel(self.password_model)
+        self.action_delegate = ActionButtonDelegate(self)
+        self.action_delegate.actionTriggered.connect(self.actionTriggered)
+        self.setItemDelegateForColumn(ACTION_COLUMN, self.action_delegate)
+
+        self.verticalHeader().setVisible(False)
+        # 固定行高，视图不需要逐行计算高度
+        self.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.verticalHeader().setDefaultSectionSize(ROW_HEIGHT)
+        self.setAlternatingRowColors(True)
+        self.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setMouseTracking(True)
+
+        # 列宽固定（自适应内容需要测量各行文字）
+        header = self.horizontalHeader()
+        header.setStretchLastSection(True)
+        self.setColumnWidth(0, 150)  # 标题
+        self.setColumnWidth(1, 120)  # 用户名
+        self.setColumnWidth(PASSWORD_COLUMN, 100)
+        self.setColumnWidth(TYPE_COLUMN, 100)
+        header.setSectionResizeMode(4, QHeaderView.Stretch)  # 连接信息
+        header.setSectionResizeMode(ACTION_COLUMN, QHeaderView.Fixed)
+        self.setColumnWidth(ACTION_COLUMN, ActionButtonDelegate.width_for(4))
+
+        # 默认保持加载顺序，点击表头后才排序
+        header.setSortIndicator(-1, Qt.AscendingOrder)
+        self.setSortingEnabled(True)
+        header.sortIndicatorChanged.connect(self._on_sort_indicator_changed)
+        header.setContextMenuPolicy(Qt.CustomContextMenu)
+        header.customContextMenuRequested.connect(self._show_header_menu)
+
+    def row_at(self, row: int):
+        """第row行的记录"""
+        return self.password_model.row_at(row)
+
+    def clear_sort(self):
+        """恢复加载顺序"""
+        header = self.horizontalHeader()
+        header.blockSignals(True)
+        header.setSortIndicator(-1, Qt.AscendingOrder)
+        header.blockSignals(False)
+        self.password_model.sort(-1)
+
+    def _on_sort_indicator_changed(self, column: int, order):
+        # 不能排序的列（密码、操作）不显示排序标记，恢复为当前的主要排序列
+        if column == -1 or column in SORT_KEYS:
+            return
+        sort_spec = self.password_model.sort_spec()
+        header = self.horizontalHeader()
+        header.blockSignals(True)
+        if sort_spec:
+            header.setSortIndicator(*sort_spec[0])
+        else:
+            header.setSortIndicator(-1, Qt.AscendingOrder)
+        header.blockSignals(False)
+
+    def _show_header_menu(self, position):
+        menu = QMenu(self)
+        menu.addAction("恢复默认顺序", self.clear_sort)
+        menu.exec(self.horizontalHeader().mapToGlobal(position))
+
+    def mouseMoveEvent(self, event):
+        # 鼠标离开操作列时清除按钮的悬停状态
+        if self.indexAt(event.position().toPoint()).column() != ACTION_COLUMN:
+            self._clear_hover()
+        super().mouseMoveEvent(event)
+
+    def leaveEvent(self, event):
+        self._clear_hover()
+        super().leaveEvent(event)
+
+    def changeEvent(self, event):
+        # 样式表或调色板变化后按钮需要按新样式重新绘制
+        if event.type() in (QEvent.StyleChange, QEvent.PaletteChange):
+            self.action_delegate.clear_cache()
+        super().changeEvent(event)
+
+    def _clear_hover(self):
+        if self.action_delegate.set_hover(None):
+            self.viewport().update()
@@ -0,0 +1,130 @@
+"""
+密钥轮换测试 - 轮换与密文格式转换交错执行、读取后被修改的记录、中断后继续
+"""
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+from src.controllers.key_rotation import KeyRotation
+from src.controllers.password_manager import PasswordManager
+from src.utils import envelope
+from src.utils.encryption import EncryptionManager
+from src.utils.kdf import KdfParams
+from src.utils.vault_config import load_config, save_config
+
+PASSWORD = "master"
+ROW_COUNT = 600
+
+
+class KeyRotationTest(unittest.TestCase):
+    def setUp(self):
+        # config.json保存在当前目录
+        self.old_cwd = os.getcwd()
+        self.directory = tempfile.mkdtemp()
+        os.chdir(self.directory)
+        config, self.old_key = envelope.create(PASSWORD, KdfParams("pbkdf2", iterations=1000))
+        save_config(config)
+        self.db_path = os.path.join(self.directory, "passwords.db")
+        self.password_manager = PasswordManager("sqlite:///" + self.db_path)
+        self.password_manager.encryption_manager.initialize(self.old_key)
+        self.password_manager.add_passwords_bulk(
+            [dict(title=f"t{i}", username="u", password=f"secret{i}") for i in range(ROW_COUNT)])
+
+    def tearDown(self):
+        self.password_manager.engine.dispose()
+        os.chdir(self.old_cwd)
+        shutil.rmtree(self.directory)
+
+    def write_with_old_key(self, password_id: int, secret: str):
+        """模拟旧密钥的写入（例如轮换前读取的密文被写回）"""
+        old = EncryptionManager()
+        old.initialize(self.old_key)
+        old.compact_records = True
+        with sqlite3.connect(self.db_path) as connection:
+            connection.execute("UPDATE passwords SET encrypted_password = ? WHERE id = ?",
+                               (old.encrypt_record(secret, password_id), password_id))
+
+    def assert_rotated(self, expected: dict = None):
+        """所有记录都只用新密钥即可解密，配置中不再保存旧密钥"""
+        self.assertFalse(KeyRotation.pending())
+        self.assertEqual(envelope.unlock_keys(load_config(), PASSWORD), [self.password_manager.encryption_manager.key])
+        self.assertNotEqual(self.password_manager.encryption_manager.key, self.old_key)
+        self.assertEqual(self.password_manager.encryption_manager.previous_ciphers, [])
+        with sqlite3.connect(self.db_path) as connection:
+            rows = connection.execute("SELECT id, encrypted_password FROM passwords ORDER BY id").fetchall()
+            checkpoints = connection.execute("SELECT COUNT(*) FROM vault_meta").fetchone()[0]
+        self.assertEqual(len(rows), ROW_COUNT)
+        self.assertEqual(checkpoints, 0)
+        expected = expected or {}
+        for password_id, value in rows:
+            secret = self.password_manager.encryption_manager.decrypt_record(value, password_id)
+            self.assertEqual(secret, expected.get(password_id, f"secret{password_id - 1}"))
+
+    def test_rotation_and_conversion_interleaved(self):
+        rotation = KeyRotation(self.password_manager, batch_size=50)
+        errors = []
+
+        def rotate():
+            try:
+                self.assertTrue(rotation.start(PASSWORD))
+                self.assertTrue(rotation.run())
+            except Exception as e:
+                errors.append(e)
+
+        def convert(done: int, total: int):
+            # 转换进行中开始轮换
+            if done == 100:
+                rotating.start()
+
+        rotating = threading.Thread(target=rotate)
+        self.password_manager.convert_records(True, batch_size=50, progress=convert, vacuum=False)
+        rotating.join()
+        self.assertEqual(errors, [])
+        self.assert_rotated()
+
+    def test_row_changed_after_batch_read_is_not_skipped(self):
+        rotation = KeyRotation(self.password_manager, batch_size=100)
+        self.assertTrue(rotation.start(PASSWORD))
+        encryption_manager = self.password_manager.encryption_manager
+        decrypt_records = encryption_manager.decrypt_records
+        changed = []
+
+        def decrypt_then_change(items):
+            # 第一批读取之后，另一个写入者用旧密钥修改了其中一条
+            results = decrypt_records(items)
+            if not changed:
+                changed.append(10)
+                self.write_with_old_key(10, "changed")
+            return results
+
+        encryption_manager.decrypt_records = decrypt_then_change
+        try:
+            self.assertTrue(rotation.run())
+        finally:
+            del encryption_manager.decrypt_records
+        self.assert_rotated({10: "changed"})
+
+    def test_resume_checks_rows_behind_checkpoint(self):
+        rotation = KeyRotation(self.password_manager, batch_size=100)
+        self.assertFalse(rotation.start("wrong"))
+        self.assertTrue(rotation.start(PASSWORD))
+        batches = []
+        self.assertFalse(rotation.run(cancelled=lambda: batches.append(None) or len(batches) > 3))
+        self.assertTrue(KeyRotation.pending())
+
+        # 中断期间检查点之前的记录被写入旧密钥的密文
+        self.write_with_old_key(5, "stale")
+        self.assertEqual(self.password_manager.get_decrypted_password(5), "stale")
+
+        # 重新解锁后继续
+        self.password_manager.encryption_manager = EncryptionManager()
+        resumed = KeyRotation(self.password_manager, batch_size=100)
+        self.assertTrue(resumed.start(PASSWORD))
+        self.assertTrue(resumed.run())
+        self.assert_rotated({5: "stale"})
+
+
+if __name__ == "__main__":
+    unittest.main()
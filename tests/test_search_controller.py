@@ -0,0 +1,69 @@
+"""
+搜索控制测试 - 逐字输入时在上一次结果中筛选与查询数据库的结果一致
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from PySide6.QtCore import QCoreApplication
+from src.controllers.password_manager import PasswordManager
+from src.controllers.search_controller import SearchController
+
+
+class SyncVault:
+    """在当前线程立即执行的AsyncVault替身，记录查询数据库的次数"""
+
+    def __init__(self):
+        self.submitted = 0
+
+    def submit(self, key, fn, *args, on_result=None, on_error=None, **kwargs):
+        self.submitted += 1
+        on_result(fn(*args, **kwargs))
+
+    def cancel(self, key):
+        pass
+
+
+class SearchControllerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QCoreApplication([])
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.password_manager = PasswordManager("sqlite:///" + os.path.join(self.directory, "passwords.db"))
+        self.password_manager.initialize("master")
+        for title in ("web server", "web-01", "db server", "webserver backup", "mail"):
+            self.password_manager.add_password(title, "admin", "secret", None)
+        self.vault = SyncVault()
+        self.controller = SearchController(self.password_manager, self.vault, debounce_ms=0)
+        self.results = {}
+        self.controller.resultsReady.connect(lambda query, rows: self.results.__setitem__(query, rows))
+
+    def tearDown(self):
+        self.password_manager.engine.dispose()
+        shutil.rmtree(self.directory)
+
+    def type_query(self, query: str):
+        """逐字输入，每一步都立即执行搜索，并与直接查询数据库的结果比较"""
+        for end in range(1, len(query) + 1):
+            typed = query[:end]
+            self.controller.search(typed)
+            self.controller._run()
+            if not typed.strip():
+                continue
+            expected = self.password_manager.search_passwords(typed, summary=True)
+            self.assertEqual([row.id for row in self.results[typed]], [row.id for row in expected], typed)
+
+    def test_typing_quoted_phrase(self):
+        self.type_query('"web server"')
+        self.assertEqual([row.title for row in self.results['"web server"']], ["web server"])
+
+    def test_typing_words_refines_previous_results(self):
+        self.type_query("web serv")
+        # 只有第一个关键字长到3个字符前后需要查询数据库，之后都在上一次的结果中筛选
+        self.assertLess(self.vault.submitted, len("web serv"))
+
+
+if __name__ == "__main__":
+    unittest.main()